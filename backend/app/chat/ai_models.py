@@ -5,12 +5,19 @@ AI模型接口模块，用于与不同的AI模型进行交互。
 将在任务3.2中完成实际的AI模型集成。
 """
 
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from typing import List, Dict, Any, Mapping, Optional, AsyncGenerator
 from abc import ABC, abstractmethod
 import asyncio
+import functools
+import re
 
 from langchain_core.messages import BaseMessage
 
+from ..config import settings
+
+# 问候语检测：按子串匹配且不区分大小写，模块加载时编译一次
+_GREETING_RE = re.compile(r"你好|hello|hi|嗨", re.IGNORECASE)
+
 
 class AIModelInterface(ABC):
     """
@@ -51,15 +58,24 @@ class AIModelInterface(ABC):
         """
         pass
     
+    @property
     @abstractmethod
+    def model_info(self) -> Mapping[str, Any]:
+        """
+        模型信息（同步访问）。
+        
+        信息只取决于初始化参数，实现类通常用functools.cached_property计算一次。
+        """
+        pass
+    
     async def get_model_info(self) -> Dict[str, Any]:
         """
         获取模型信息。
         
         Returns:
-            包含模型信息的字典
+            包含模型信息的字典（副本，调用方修改不会影响缓存）
         """
-        pass
+        return dict(self.model_info)
 
 
 class MockAIModel(AIModelInterface):
@@ -69,14 +85,16 @@ class MockAIModel(AIModelInterface):
     提供了一个简单的模拟响应生成器，不需要实际的AI模型调用。
     """
     
-    def __init__(self, model_name: str = "mock-model"):
+    def __init__(self, model_name: str = "mock-model", response_delay: Optional[float] = None):
         """
         初始化模拟AI模型。
         
         Args:
             model_name: 模型名称
+            response_delay: 模拟的网络延迟（秒），None时使用配置默认值
         """
         self.model_name = model_name
+        self.response_delay = response_delay if response_delay is not None else settings.MOCK_AI_DELAY
         self.mock_responses = [
             "这是一个模拟的AI响应，用于测试对话流程。",
             "我理解您的问题，这里是一个模拟回答。",
@@ -102,15 +120,14 @@ class MockAIModel(AIModelInterface):
         if not messages:
             return self.mock_responses[0]
         
-        last_message = messages[-1]
-        content = last_message.content if hasattr(last_message, 'content') else ""
+        content = getattr(messages[-1], 'content', "")
         
         # 基于输入内容的长度选择不同的模拟响应
         index = len(content) % len(self.mock_responses)
         response = self.mock_responses[index]
         
         # 如果是问候，添加问候语
-        if any(greeting in content.lower() for greeting in ["你好", "hello", "hi", "嗨"]):
+        if _GREETING_RE.search(content):
             response = f"你好！很高兴见到你。{response}"
         
         # 如果消息中包含问题，添加一个更具回应性的前缀
@@ -140,7 +157,7 @@ class MockAIModel(AIModelInterface):
         
         for i, word in enumerate(words):
             # 模拟网络延迟
-            await asyncio.sleep(0.1)  # 100ms延迟
+            await asyncio.sleep(self.response_delay)
             
             # 添加空格，除了第一个单词
             if i == 0:
@@ -148,17 +165,13 @@ class MockAIModel(AIModelInterface):
             else:
                 yield f" {word}"
     
-    async def get_model_info(self) -> Dict[str, Any]:
-        """
-        获取模拟模型信息。
-        
-        Returns:
-            包含模型信息的字典
-        """
+    @functools.cached_property
+    def model_info(self) -> Dict[str, Any]:
+        """模拟模型信息。"""
         return {
             "model_name": self.model_name,
             "type": "mock",
-            "capabilities": ["basic_conversation"],
+            "capabilities": ("basic_conversation",),
             "is_mock": True
         }
 
@@ -6,6 +6,7 @@ AI模型提供者实现模块。
 
 import os
 import time
+import functools
 import logging
 import asyncio
 from typing import List, Dict, Any, Optional, Union, AsyncGenerator
@@ -225,13 +226,9 @@ class OpenAIModel(AIModelInterface):
             else:
                 raise Exception(f"OpenAI服务错误: {str(e)}")
 
-    async def get_model_info(self) -> Dict[str, Any]:
-        """
-        获取OpenAI模型信息。
-        
-        Returns:
-            包含模型信息的字典
-        """
+    @functools.cached_property
+    def model_info(self) -> Dict[str, Any]:
+        """OpenAI模型信息。"""
         return {
             "provider": "OpenAI",
             "model_name": self.model_name,
@@ -402,13 +399,9 @@ class OllamaModel(AIModelInterface):
             else:
                 raise Exception(f"Ollama服务错误: {str(e)}")
 
-    async def get_model_info(self) -> Dict[str, Any]:
-        """
-        获取Ollama模型信息。
-        
-        Returns:
-            包含模型信息的字典
-        """
+    @functools.cached_property
+    def model_info(self) -> Dict[str, Any]:
+        """Ollama模型信息。"""
         return {
             "provider": "Ollama",
             "model_name": self.model_name,
@@ -587,13 +580,9 @@ class MoonshotModel(AIModelInterface):
             else:
                 raise Exception(f"Moonshot服务错误: {str(e)}")
 
-    async def get_model_info(self) -> Dict[str, Any]:
-        """
-        获取Moonshot模型信息。
-        
-        Returns:
-            包含模型信息的字典
-        """
+    @functools.cached_property
+    def model_info(self) -> Dict[str, Any]:
+        """Moonshot模型信息。"""
         return {
             "provider": "Moonshot",
             "model_name": self.model_name,
@@ -608,7 +597,8 @@ def create_default_model() -> AIModelInterface:
     """
     创建默认AI模型实例。
     
-    根据环境配置选择合适的模型实现。
+    根据环境配置选择合适的模型实现。每次调用都会重新探测Ollama服务并返回新实例，
+    需要复用时由调用方持有（例如测试中的会话级夹具）。
     
     Returns:
         AIModelInterface实例
@@ -28,6 +28,10 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class ConcurrentStreamingError(ValueError):
+    """Raised when a conversation is already being streamed by another request."""
+
+
 class ChatState(TypedDict):
     """
     State structure for the chat workflow.
@@ -86,12 +90,12 @@ class ChatWorkflow:
             The conversation object
             
         Raises:
-            ValueError: If conversation is already being streamed and this is another stream request
+            ConcurrentStreamingError: If conversation is already being streamed and this is another stream request
         """
         with self._conversation_lock:
             # Check for concurrent streaming operations
             if is_streaming and conversation_id in self._active_streams:
-                raise ValueError(f"Conversation {conversation_id} is already being streamed")
+                raise ConcurrentStreamingError(f"Conversation {conversation_id} is already being streamed")
             
             # Create conversation if it doesn't exist
             if conversation_id not in self.conversations:
@@ -298,6 +302,22 @@ class ChatWorkflow:
                 processing_time=0.0
             )
 
+    async def process_messages_batch(self, requests: List[ChatRequest]) -> List[ChatResponse]:
+        """
+        Process several independent chat messages concurrently.
+        
+        Each request runs through the compiled graph as in process_message (including
+        its error handling), so responses are returned in request order. Requests for
+        the same conversation should not share a batch, since their turns would interleave.
+        
+        Args:
+            requests: The chat requests to process
+            
+        Returns:
+            One ChatResponse per request, in the same order
+        """
+        return list(await asyncio.gather(*(self.process_message(r) for r in requests)))
+
     async def process_message_stream(self, request: ChatRequest) -> AsyncGenerator[StreamChunk, None]:
         """
         Process a chat message and return streaming response using Direct Streaming approach.
@@ -353,6 +373,7 @@ class ChatWorkflow:
                 return
             
             # 2. Use thread-safe conversation context manager for streaming
+            # (entering it rejects a second concurrent stream on the same conversation)
             async with self._conversation_context(conversation_id, is_streaming=True) as conversation:
                 try:
                     # Add user message to conversation
@@ -412,160 +433,161 @@ class ChatWorkflow:
                     )
                     return
             
-            # 4. Direct AI model streaming call with comprehensive error handling
-            try:
-                logger.info(f"开始直接流式AI调用，会话ID: {conversation_id}")
-                ai_stream_started = False
-                
-                async for chunk_content in self.ai_model.generate_response_stream(langchain_messages):
-                    if not ai_stream_started:
-                        ai_stream_started = True
-                        logger.info(f"AI流式响应已开始 - 会话ID: {conversation_id}")
+                # 4. Direct AI model streaming call with comprehensive error handling
+                # (still inside the streaming context so concurrent streams stay blocked)
+                try:
+                    logger.info(f"开始直接流式AI调用，会话ID: {conversation_id}")
+                    ai_stream_started = False
                     
-                    if chunk_content:
-                        full_response += chunk_content
-                        chunk_index += 1
+                    async for chunk_content in self.ai_model.generate_response_stream(langchain_messages):
+                        if not ai_stream_started:
+                            ai_stream_started = True
+                            logger.info(f"AI流式响应已开始 - 会话ID: {conversation_id}")
+                        
+                        if chunk_content:
+                            full_response += chunk_content
+                            chunk_index += 1
+                            yield StreamChunk(
+                                type="chunk",
+                                content=chunk_content,
+                                conversation_id=conversation_id,
+                                metadata={
+                                    "chunk_index": chunk_index,
+                                    "response_length": len(full_response)
+                                }
+                            )
+                    
+                    # Check if we received any content
+                    if not ai_stream_started or not full_response:
+                        logger.warning(f"AI模型未返回任何内容 - 会话ID: {conversation_id}")
+                        error_occurred = True
                         yield StreamChunk(
-                            type="chunk",
-                            content=chunk_content,
+                            type="error",
+                            content="AI模型未能生成响应，请重试",
                             conversation_id=conversation_id,
                             metadata={
-                                "chunk_index": chunk_index,
-                                "response_length": len(full_response)
+                                "error_type": "EmptyResponseError",
+                                "error_category": "ai_model_response",
+                                "processing_time": round(time.time() - start_time, 3)
                             }
                         )
-                
-                # Check if we received any content
-                if not ai_stream_started or not full_response:
-                    logger.warning(f"AI模型未返回任何内容 - 会话ID: {conversation_id}")
+                        return
+                        
+                except asyncio.TimeoutError as e:
+                    logger.error(f"AI模型调用超时 - 会话ID: {conversation_id}: {str(e)}")
                     error_occurred = True
                     yield StreamChunk(
                         type="error",
-                        content="AI模型未能生成响应，请重试",
+                        content="AI响应超时，请稍后重试",
                         conversation_id=conversation_id,
                         metadata={
-                            "error_type": "EmptyResponseError",
-                            "error_category": "ai_model_response",
+                            "error_type": "TimeoutError",
+                            "error_category": "ai_model_timeout",
                             "processing_time": round(time.time() - start_time, 3)
                         }
                     )
                     return
                     
-            except asyncio.TimeoutError as e:
-                logger.error(f"AI模型调用超时 - 会话ID: {conversation_id}: {str(e)}")
-                error_occurred = True
-                yield StreamChunk(
-                    type="error",
-                    content="AI响应超时，请稍后重试",
-                    conversation_id=conversation_id,
-                    metadata={
-                        "error_type": "TimeoutError",
-                        "error_category": "ai_model_timeout",
-                        "processing_time": round(time.time() - start_time, 3)
-                    }
-                )
-                return
-                
-            except ConnectionError as e:
-                logger.error(f"AI模型连接错误 - 会话ID: {conversation_id}: {str(e)}")
-                error_occurred = True
-                yield StreamChunk(
-                    type="error",
-                    content="AI服务连接失败，请检查网络连接后重试",
-                    conversation_id=conversation_id,
-                    metadata={
-                        "error_type": "ConnectionError",
-                        "error_category": "network_error",
-                        "processing_time": round(time.time() - start_time, 3)
-                    }
-                )
-                return
-                
-            except ValueError as e:
-                logger.error(f"AI模型参数错误 - 会话ID: {conversation_id}: {str(e)}")
-                error_occurred = True
-                
-                # Handle authentication and parameter errors
-                if "api_key" in str(e).lower() or "unauthorized" in str(e).lower() or "authentication" in str(e).lower():
-                    error_message = "AI服务认证失败，请检查API密钥配置"
-                    error_category = "authentication_error"
-                elif "model" in str(e).lower() and "not found" in str(e).lower():
-                    error_message = "AI模型不可用，请联系管理员"
-                    error_category = "model_error"
-                else:
-                    error_message = "AI服务参数错误，请重试"
-                    error_category = "parameter_error"
-                
-                yield StreamChunk(
-                    type="error",
-                    content=error_message,
-                    conversation_id=conversation_id,
-                    metadata={
-                        "error_type": type(e).__name__,
-                        "error_category": error_category,
-                        "error_details": str(e)[:200],
-                        "processing_time": round(time.time() - start_time, 3)
-                    }
-                )
-                return
-                
-            except Exception as e:
-                logger.error(f"AI模型调用失败 - 会话ID: {conversation_id}: {str(e)}", exc_info=True)
-                error_occurred = True
-                
-                # Provide user-friendly error messages based on error type
-                if "rate_limit" in str(e).lower() or "quota" in str(e).lower():
-                    error_message = "AI服务请求频率过高，请稍后重试"
-                    error_category = "rate_limit_error"
-                else:
-                    error_message = "AI服务暂时不可用，请稍后重试"
-                    error_category = "ai_service_error"
-                
-                yield StreamChunk(
-                    type="error",
-                    content=error_message,
-                    conversation_id=conversation_id,
-                    metadata={
-                        "error_type": type(e).__name__,
-                        "error_category": error_category,
-                        "error_details": str(e)[:200],  # Limit error details length
-                        "processing_time": round(time.time() - start_time, 3)
-                    }
-                )
-                return
-            
-            # 5. Update conversation state with complete response (thread-safe)
-            try:
-                if full_response and not error_occurred:
-                    # Use thread-safe method to add AI response to conversation
-                    ai_message = self._safe_add_message(
-                        conversation_id, 
-                        full_response, 
-                        MessageType.AI,
+                except ConnectionError as e:
+                    logger.error(f"AI模型连接错误 - 会话ID: {conversation_id}: {str(e)}")
+                    error_occurred = True
+                    yield StreamChunk(
+                        type="error",
+                        content="AI服务连接失败，请检查网络连接后重试",
+                        conversation_id=conversation_id,
                         metadata={
-                            "streaming_session": True,
-                            "chunk_count": chunk_index,
-                            "processing_time": round(time.time() - start_time, 3),
-                            "response_length": len(full_response)
+                            "error_type": "ConnectionError",
+                            "error_category": "network_error",
+                            "processing_time": round(time.time() - start_time, 3)
                         }
                     )
-                    logger.info(f"流式响应完成并保存到会话 - 会话ID: {conversation_id}, 总共{chunk_index}个块，响应长度: {len(full_response)}")
+                    return
                     
-            except Exception as e:
-                logger.error(f"更新会话状态失败 - 会话ID: {conversation_id}: {str(e)}", exc_info=True)
-                # Don't return error here as the response was successful, just log the issue
-                # The streaming was successful, but we couldn't save the final state
-                yield StreamChunk(
-                    type="warning",
-                    content="",
-                    conversation_id=conversation_id,
-                    metadata={
-                        "warning_type": "state_save_failed",
-                        "message": "响应生成成功，但保存会话状态时出现问题",
-                        "processing_time": round(time.time() - start_time, 3)
-                    }
-                )
+                except ValueError as e:
+                    logger.error(f"AI模型参数错误 - 会话ID: {conversation_id}: {str(e)}")
+                    error_occurred = True
+                    
+                    # Handle authentication and parameter errors
+                    if "api_key" in str(e).lower() or "unauthorized" in str(e).lower() or "authentication" in str(e).lower():
+                        error_message = "AI服务认证失败，请检查API密钥配置"
+                        error_category = "authentication_error"
+                    elif "model" in str(e).lower() and "not found" in str(e).lower():
+                        error_message = "AI模型不可用，请联系管理员"
+                        error_category = "model_error"
+                    else:
+                        error_message = "AI服务参数错误，请重试"
+                        error_category = "parameter_error"
+                    
+                    yield StreamChunk(
+                        type="error",
+                        content=error_message,
+                        conversation_id=conversation_id,
+                        metadata={
+                            "error_type": type(e).__name__,
+                            "error_category": error_category,
+                            "error_details": str(e)[:200],
+                            "processing_time": round(time.time() - start_time, 3)
+                        }
+                    )
+                    return
+                    
+                except Exception as e:
+                    logger.error(f"AI模型调用失败 - 会话ID: {conversation_id}: {str(e)}", exc_info=True)
+                    error_occurred = True
+                    
+                    # Provide user-friendly error messages based on error type
+                    if "rate_limit" in str(e).lower() or "quota" in str(e).lower():
+                        error_message = "AI服务请求频率过高，请稍后重试"
+                        error_category = "rate_limit_error"
+                    else:
+                        error_message = "AI服务暂时不可用，请稍后重试"
+                        error_category = "ai_service_error"
+                    
+                    yield StreamChunk(
+                        type="error",
+                        content=error_message,
+                        conversation_id=conversation_id,
+                        metadata={
+                            "error_type": type(e).__name__,
+                            "error_category": error_category,
+                            "error_details": str(e)[:200],  # Limit error details length
+                            "processing_time": round(time.time() - start_time, 3)
+                        }
+                    )
+                    return
                 
+                # 5. Update conversation state with complete response (thread-safe)
+                try:
+                    if full_response and not error_occurred:
+                        # Use thread-safe method to add AI response to conversation
+                        ai_message = self._safe_add_message(
+                            conversation_id, 
+                            full_response, 
+                            MessageType.AI,
+                            metadata={
+                                "streaming_session": True,
+                                "chunk_count": chunk_index,
+                                "processing_time": round(time.time() - start_time, 3),
+                                "response_length": len(full_response)
+                            }
+                        )
+                        logger.info(f"流式响应完成并保存到会话 - 会话ID: {conversation_id}, 总共{chunk_index}个块，响应长度: {len(full_response)}")
+                        
+                except Exception as e:
+                    logger.error(f"更新会话状态失败 - 会话ID: {conversation_id}: {str(e)}", exc_info=True)
+                    # Don't return error here as the response was successful, just log the issue
+                    # The streaming was successful, but we couldn't save the final state
+                    yield StreamChunk(
+                        type="warning",
+                        content="",
+                        conversation_id=conversation_id,
+                        metadata={
+                            "warning_type": "state_save_failed",
+                            "message": "响应生成成功，但保存会话状态时出现问题",
+                            "processing_time": round(time.time() - start_time, 3)
+                        }
+                    )
+                    
             # 6. Send end event
             if not error_occurred:
                 processing_time = time.time() - start_time
@@ -582,6 +604,19 @@ class ChatWorkflow:
                     }
                 )
             
+        except ConcurrentStreamingError as e:
+            logger.warning(f"会话正在流式处理中 - 会话ID: {conversation_id}")
+            yield StreamChunk(
+                type="error",
+                content=str(e),
+                conversation_id=conversation_id,
+                metadata={
+                    "error_type": "ConcurrentStreamingError",
+                    "error_category": "concurrent_streaming",
+                    "processing_time": round(time.time() - start_time, 3)
+                }
+            )
+            
         except asyncio.CancelledError:
             # Handle client disconnection gracefully
             logger.info(f"流式请求被取消 - 会话ID: {conversation_id}")
@@ -645,6 +680,28 @@ class ChatWorkflow:
                 return True
             return False
     
+    def bulk_clear(self, conversation_ids: List[str]) -> int:
+        """
+        Clear multiple conversations under a single lock acquisition (thread-safe).
+        
+        Conversations that are currently being streamed are skipped.
+        
+        Args:
+            conversation_ids: The conversation identifiers to clear
+            
+        Returns:
+            Number of conversations that were found and cleared
+        """
+        cleared = 0
+        with self._conversation_lock:
+            for conversation_id in conversation_ids:
+                if conversation_id in self._active_streams:
+                    continue
+                if self.conversations.pop(conversation_id, None) is not None:
+                    cleared += 1
+        logger.info(f"Bulk cleared {cleared} conversations")
+        return cleared
+    
     def get_active_conversations_count(self) -> int:
         """
         Get the number of active conversations (thread-safe).
@@ -42,6 +42,9 @@ class Settings:
     DEFAULT_MODEL_TEMPERATURE: float = float(os.getenv("DEFAULT_MODEL_TEMPERATURE", "0.7"))
     DEFAULT_MODEL_MAX_RETRIES: int = int(os.getenv("DEFAULT_MODEL_MAX_RETRIES", "3"))
     
+    # 模拟模型配置（测试时可调小以缩短耗时）
+    MOCK_AI_DELAY: float = float(os.getenv("MOCK_AI_DELAY", "0.1"))
+    
     @property
     def is_development(self) -> bool:
         """判断是否为开发环境"""
@@ -52,13 +55,17 @@ class Settings:
         """判断是否为生产环境"""
         return self.APP_ENV.lower() == "production"
     
-    def get_ai_provider_status(self) -> dict:
-        """获取AI提供者配置状态"""
-        return {
+    def __init__(self):
+        # 配置在导入时从环境变量读取后不再变化，AI提供者状态只需计算一次
+        self._ai_provider_status = {
             "moonshot_configured": bool(self.MOONSHOT_API_KEY),
             "openai_configured": bool(self.OPENAI_API_KEY),
             "ollama_url": self.OLLAMA_BASE_URL
         }
+    
+    def get_ai_provider_status(self) -> dict:
+        """获取AI提供者配置状态（返回副本，调用方修改不影响缓存）"""
+        return dict(self._ai_provider_status)
 
 
 # 创建全局设置实例
@@ -3,8 +3,8 @@ Chat-related Pydantic models for request/response handling.
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from typing import Annotated, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, StringConstraints
 
 
 class ChatRequest(BaseModel):
@@ -15,10 +15,11 @@ class ChatRequest(BaseModel):
         message: User's input message (required, 1-1000 characters)
         conversation_id: Optional conversation identifier for context
     """
-    message: str = Field(
+    message: Annotated[
+        str,
+        StringConstraints(strip_whitespace=True, min_length=1, max_length=1000)
+    ] = Field(
         ...,
-        min_length=1,
-        max_length=1000,
         description="User's input message"
     )
     conversation_id: Optional[str] = Field(
@@ -26,14 +27,6 @@ class ChatRequest(BaseModel):
         description="Optional conversation ID for maintaining context"
     )
     
-    @field_validator('message')
-    @classmethod
-    def validate_message(cls, v):
-        """Validate message content."""
-        if not v or not v.strip():
-            raise ValueError('Message cannot be empty or whitespace only')
-        return v.strip()
-    
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
@@ -2,11 +2,46 @@
 Message and conversation-related Pydantic models.
 """
 
+import itertools
 import uuid
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timezone
 from enum import Enum
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
+from itertools import islice
+from typing import Annotated, List, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, StringConstraints
+
+
+# Message ids: a random per-process prefix plus a monotonic counter, so ids stay
+# unique across restarts without paying for uuid4() on every message
+_MSG_ID_PREFIX = f"msg_{uuid.uuid4().hex[:8]}_"
+_msg_counter = itertools.count()
+
+
+def _next_message_id() -> str:
+    """Generate the next message identifier."""
+    return f"{_MSG_ID_PREFIX}{next(_msg_counter):012x}"
+
+
+def _timestamp_sort_key(message: Any) -> datetime:
+    """
+    Sort key for raw message dicts (or Message instances) by timestamp.
+    
+    Timestamps are normalized to naive UTC so persisted data mixing naive and
+    "Z"-suffixed values can be ordered. Missing timestamps default to "now" during
+    validation and so sort last; unparseable ones are left for validation to reject.
+    """
+    ts = message.get("timestamp") if isinstance(message, dict) else getattr(message, "timestamp", None)
+    if isinstance(ts, str):
+        try:
+            ts = datetime.fromisoformat(ts)
+        except ValueError:
+            ts = None
+    if not isinstance(ts, datetime):
+        return datetime.max
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
 
 
 class MessageType(str, Enum):
@@ -29,13 +64,14 @@ class Message(BaseModel):
         metadata: Optional metadata for the message
     """
     id: str = Field(
-        default_factory=lambda: str(uuid.uuid4()),
+        default_factory=_next_message_id,
         description="Unique message identifier"
     )
-    content: str = Field(
+    content: Annotated[
+        str,
+        StringConstraints(strip_whitespace=True, min_length=1, max_length=10000)
+    ] = Field(
         ...,
-        min_length=1,
-        max_length=10000,
         description="Message content"
     )
     type: MessageType = Field(
@@ -55,30 +91,14 @@ class Message(BaseModel):
         description="Optional metadata for the message"
     )
     
-    @validator('content')
-    def validate_content(cls, v):
-        """Validate message content."""
-        if not v or not v.strip():
-            raise ValueError('Message content cannot be empty or whitespace only')
-        return v.strip()
-    
     def to_dict(self) -> Dict[str, Any]:
-        """Convert message to dictionary for serialization."""
-        return {
-            "id": self.id,
-            "content": self.content,
-            "type": self.type.value,
-            "timestamp": self.timestamp.isoformat(),
-            "conversation_id": self.conversation_id,
-            "metadata": self.metadata
-        }
+        """Convert message to a JSON-compatible dictionary for serialization."""
+        return self.model_dump(mode="json")
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Message":
-        """Create message from dictionary."""
-        if isinstance(data.get("timestamp"), str):
-            data["timestamp"] = datetime.fromisoformat(data["timestamp"].replace("Z", "+00:00"))
-        return cls(**data)
+        """Create message from dictionary (ISO timestamp strings are parsed by Pydantic)."""
+        return cls.model_validate(data)
     
     class Config:
         """Pydantic configuration."""
@@ -103,7 +123,7 @@ class Conversation(BaseModel):
     
     Attributes:
         id: Unique conversation identifier
-        messages: List of messages in the conversation
+        messages: List of messages in the conversation, oldest first
         created_at: Conversation creation timestamp
         updated_at: Last update timestamp
         metadata: Optional conversation metadata
@@ -129,6 +149,24 @@ class Conversation(BaseModel):
         description="Optional conversation metadata"
     )
     
+    # Messages bucketed by type, kept in step with self.messages
+    _by_type: Dict[MessageType, List[Message]] = PrivateAttr(default_factory=lambda: defaultdict(list))
+    
+    def model_post_init(self, __context: Any) -> None:
+        self._rebuild_type_index()
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Reassigning the message list (e.g. trimming history) rebuilds the type index
+        if name == "messages":
+            self._rebuild_type_index()
+    
+    def _rebuild_type_index(self) -> None:
+        """Rebuild the per-type message index from self.messages."""
+        self._by_type = defaultdict(list)
+        for msg in self.messages:
+            self._by_type[msg.type].append(msg)
+    
     def add_message(self, content: str, message_type: MessageType, metadata: Optional[Dict[str, Any]] = None) -> Message:
         """
         Add a new message to the conversation.
@@ -148,41 +186,53 @@ class Conversation(BaseModel):
             metadata=metadata or {}
         )
         self.messages.append(message)
-        self.updated_at = datetime.utcnow()
+        self._by_type[message_type].append(message)
+        # Reuse the message's timestamp rather than reading the clock a second time
+        self.updated_at = message.timestamp
         return message
     
     def get_messages_by_type(self, message_type: MessageType) -> List[Message]:
-        """Get all messages of a specific type."""
-        return [msg for msg in self.messages if msg.type == message_type]
+        """
+        Get all messages of a specific type (from the per-type index, no scan).
+        
+        The index follows add_message() and reassignment of messages. Messages appended
+        to or removed from the list directly are picked up by the size check below;
+        replacing a message in place is not, so use add_message() to add messages.
+        """
+        if sum(map(len, self._by_type.values())) != len(self.messages):
+            self._rebuild_type_index()
+        return list(self._by_type.get(message_type, ()))
     
     def get_recent_messages(self, limit: int = 10) -> List[Message]:
-        """Get the most recent messages."""
-        return sorted(self.messages, key=lambda x: x.timestamp, reverse=True)[:limit]
+        """Get the most recent messages (newest first) from the tail of the list."""
+        return list(islice(reversed(self.messages), limit))
+    
+    def recent_messages_view(self, limit: int = 10) -> Tuple[Message, ...]:
+        """
+        Get the most recent messages (newest first) without sorting or copying the full list.
+        
+        Relies on messages being stored in insertion (chronological) order.
+        """
+        return tuple(islice(reversed(self.messages), limit))
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert conversation to dictionary for serialization."""
-        return {
-            "id": self.id,
-            "messages": [msg.to_dict() for msg in self.messages],
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-            "metadata": self.metadata
-        }
+        """Convert conversation (including its messages) to a JSON-compatible dictionary."""
+        return self.model_dump(mode="json")
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Conversation":
-        """Create conversation from dictionary."""
-        # Convert timestamp strings back to datetime objects
-        if isinstance(data.get("created_at"), str):
-            data["created_at"] = datetime.fromisoformat(data["created_at"].replace("Z", "+00:00"))
-        if isinstance(data.get("updated_at"), str):
-            data["updated_at"] = datetime.fromisoformat(data["updated_at"].replace("Z", "+00:00"))
-        
-        # Convert message dictionaries back to Message objects
-        if "messages" in data:
-            data["messages"] = [Message.from_dict(msg) for msg in data["messages"]]
+        """
+        Create conversation from dictionary; nested messages are validated in the same pass.
         
-        return cls(**data)
+        Messages are sorted by timestamp once here, so the append-order (chronological)
+        invariant that get_recent_messages relies on also holds for loaded conversations.
+        """
+        messages = data.get("messages")
+        if messages:
+            # Sort the raw input (Timsort is linear when already in order) so validation
+            # builds the type index once; the caller's dict is left untouched
+            data = {**data, "messages": sorted(messages, key=_timestamp_sort_key)}
+        return cls.model_validate(data)
     
     class Config:
         """Pydantic configuration."""
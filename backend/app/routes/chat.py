@@ -9,7 +9,7 @@ import logging
 import time
 import json
 import asyncio
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from datetime import datetime
 from typing import Any, Dict
@@ -17,15 +17,24 @@ from typing import Any, Dict
 from ..models.chat import ChatRequest, ChatResponse, StreamChunk
 from ..chat.workflow import chat_workflow
 
-def json_default_serializer(obj: Any) -> str:
-    """JSON serializer for objects not serializable by default json code"""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj).__name__} not serializable")
+def _get_client_ip(http_request: Request) -> str:
+    """获取客户端IP，作为路由依赖注入，每个请求只解析一次"""
+    client = http_request.client
+    return client.host if client else "unknown"
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# SSE响应头（模块级常量，避免每次请求重新构建）
+# X-Accel-Buffering: no 用于关闭nginx代理缓冲，保证流式数据及时下发
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Cache-Control",
+    "X-Accel-Buffering": "no"
+}
+
 # 创建路由器
 router = APIRouter(
     prefix="/api/chat",
@@ -40,27 +49,25 @@ router = APIRouter(
 
 
 @router.post("/stream")
-async def chat_stream(request: ChatRequest, http_request: Request):
+async def chat_stream(request: ChatRequest, client_ip: str = Depends(_get_client_ip)):
     """
     处理流式聊天请求并返回Server-Sent Events响应。
     """
-    client_ip = http_request.client.host if http_request.client else "unknown"
-    
     try:
-        if not request.message or not request.message.strip():
-            logger.warning(f"收到空消息请求 - IP: {client_ip}")
-            raise HTTPException(status_code=400, detail="Message cannot be empty")
-        
         logger.info(
             f"收到流式聊天请求 - IP: {client_ip}, 会话ID: {request.conversation_id or 'new'}"
         )
         
         async def generate_sse():
-            """生成Server-Sent Events格式的数据流"""
+            """
+            生成Server-Sent Events格式的数据流。
+            
+            每个块通过Pydantic的model_dump_json直接序列化（Rust实现，原生处理datetime，
+            不转义非ASCII字符），不经过中间dict和标准库json。
+            """
             try:
                 async for chunk in chat_workflow.process_message_stream(request):
-                    chunk_data = chunk.model_dump()
-                    yield f"data: {json.dumps(chunk_data, ensure_ascii=False, default=json_default_serializer)}\n\n"
+                    yield f"data: {chunk.model_dump_json()}\n\n"
                     
             except asyncio.CancelledError:
                 # 客户端断开连接，正常情况
@@ -83,7 +90,7 @@ async def chat_stream(request: ChatRequest, http_request: Request):
                 )
                 
                 try:
-                    yield f"data: {json.dumps(error_chunk.model_dump(), ensure_ascii=False, default=json_default_serializer)}\n\n"
+                    yield f"data: {error_chunk.model_dump_json()}\n\n"
                 except Exception as json_error:
                     logger.error(f"JSON序列化错误: {json_error}")
                     # 发送简单的错误消息
@@ -98,12 +105,7 @@ async def chat_stream(request: ChatRequest, http_request: Request):
         return StreamingResponse(
             generate_sse(),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Cache-Control"
-            }
+            headers=_SSE_HEADERS
         )
         
     except HTTPException:
@@ -117,13 +119,13 @@ async def chat_stream(request: ChatRequest, http_request: Request):
 
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest, http_request: Request) -> ChatResponse:
+async def chat(request: ChatRequest, client_ip: str = Depends(_get_client_ip)) -> ChatResponse:
     """
     处理聊天请求并返回AI响应。
     
     Args:
         request: 包含用户消息和可选会话ID的请求
-        http_request: FastAPI请求对象，用于获取客户端信息
+        client_ip: 客户端IP（由依赖注入提供）
         
     Returns:
         AI响应和会话信息
@@ -133,7 +135,6 @@ async def chat(request: ChatRequest, http_request: Request) -> ChatResponse:
     """
     # 记录请求开始时间
     start_time = time.time()
-    client_ip = http_request.client.host if http_request.client else "unknown"
     
     try:
         # 记录请求信息
@@ -144,14 +145,6 @@ async def chat(request: ChatRequest, http_request: Request) -> ChatResponse:
             f"消息预览: {request.message[:50]}..."
         )
         
-        # 验证请求内容
-        if not request.message or not request.message.strip():
-            logger.warning(f"收到空消息请求 - IP: {client_ip}")
-            raise HTTPException(
-                status_code=400, 
-                detail="Message cannot be empty"
-            )
-        
         # 处理聊天请求
         response = await chat_workflow.process_message(request)
         
@@ -206,8 +199,8 @@ async def chat(request: ChatRequest, http_request: Request) -> ChatResponse:
 @router.get("/history/{conversation_id}")
 async def get_conversation_history(
     conversation_id: str, 
-    http_request: Request,
-    limit: int = 10
+    limit: int = 10,
+    client_ip: str = Depends(_get_client_ip)
 ) -> Dict[str, Any]:
     """
     获取指定会话的历史记录。
@@ -215,7 +208,7 @@ async def get_conversation_history(
     Args:
         conversation_id: 会话ID
         limit: 返回的最大消息数量 (1-100)
-        http_request: FastAPI请求对象
+        client_ip: 客户端IP（由依赖注入提供）
         
     Returns:
         包含会话历史的字典
@@ -223,8 +216,6 @@ async def get_conversation_history(
     Raises:
         HTTPException: 如果参数无效或获取失败
     """
-    client_ip = http_request.client.host if http_request.client else "unknown"
-    
     try:
         # 验证参数
         if not conversation_id or not conversation_id.strip():
@@ -270,13 +261,13 @@ async def get_conversation_history(
 
 
 @router.delete("/history/{conversation_id}")
-async def clear_conversation(conversation_id: str, http_request: Request) -> Dict[str, Any]:
+async def clear_conversation(conversation_id: str, client_ip: str = Depends(_get_client_ip)) -> Dict[str, Any]:
     """
     清除指定会话的历史记录。
     
     Args:
         conversation_id: 会话ID
-        http_request: FastAPI请求对象
+        client_ip: 客户端IP（由依赖注入提供）
         
     Returns:
         操作结果
@@ -284,8 +275,6 @@ async def clear_conversation(conversation_id: str, http_request: Request) -> Dic
     Raises:
         HTTPException: 如果参数无效或操作失败
     """
-    client_ip = http_request.client.host if http_request.client else "unknown"
-    
     try:
         # 验证参数
         if not conversation_id or not conversation_id.strip():
@@ -328,18 +317,16 @@ async def clear_conversation(conversation_id: str, http_request: Request) -> Dic
 
 
 @router.get("/conversations")
-async def list_conversations(http_request: Request) -> Dict[str, Any]:
+async def list_conversations(client_ip: str = Depends(_get_client_ip)) -> Dict[str, Any]:
     """
     获取所有活跃会话的列表。
     
     Args:
-        http_request: FastAPI请求对象
+        client_ip: 客户端IP（由依赖注入提供）
         
     Returns:
         包含会话列表的字典
     """
-    client_ip = http_request.client.host if http_request.client else "unknown"
-    
     try:
         logger.info(f"获取会话列表请求 - IP: {client_ip}")
         
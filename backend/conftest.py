@@ -0,0 +1,71 @@
+"""
+pytest共享夹具
+
+在一次pytest运行中只构建一次FastAPI应用和TestClient，
+避免每个测试模块重复初始化工作流和AI模型。
+同时在这里统一设置导入路径并预先导入较重的模块。
+"""
+
+import os
+import sys
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到Python路径（整个测试会话只需一次）
+sys.path.insert(0, os.path.dirname(__file__))
+
+# 测试不验证真实延迟，缩短模拟模型的等待时间（需在导入app之前设置）
+os.environ.setdefault("MOCK_AI_DELAY", "0.001")
+
+# 预先导入工作流及其依赖（LangGraph、LangChain），导入开销在会话开始时一次性支付
+import app.chat.workflow  # noqa: E402,F401
+from testing_utils import LOOP_FACTORY, created_conversations  # noqa: E402
+
+
+if LOOP_FACTORY is not None:
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        """异步测试运行在uvloop事件循环上（流式迭代和套接字I/O更快）"""
+        return {"uvloop": LOOP_FACTORY}
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _created_convs():
+    """会话结束时一次性清除所有登记过的会话"""
+    yield created_conversations
+    from app.chat.workflow import chat_workflow
+    chat_workflow.bulk_clear(created_conversations)
+    created_conversations.clear()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def default_workflow():
+    """会话级ChatWorkflow（默认模型），图只编译一次；各测试通过不同的会话ID隔离"""
+    from app.chat.workflow import ChatWorkflow
+    w = ChatWorkflow()
+    await w.async_setup()
+    return w
+
+
+@pytest.fixture(scope="session")
+def client():
+    """会话级TestClient，进入上下文时会运行应用的lifespan"""
+    from app.main import app
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest_asyncio.fixture
+async def async_client(client):
+    """
+    基于ASGITransport的进程内异步客户端。
+    
+    应用的lifespan（编译聊天工作流）由会话级client夹具运行一次，这里不再逐个测试重复进入。
+    """
+    transport = httpx.ASGITransport(app=client.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
@@ -5,18 +5,16 @@
 """
 
 import asyncio
+import logging
 import sys
-import os
 import time
 from typing import List, Dict, Any
 
-# 添加应用目录到Python路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
-
 from app.chat.workflow import ChatWorkflow
 from app.chat.ai_models import MockAIModel
-from app.chat.ai_providers import OpenAIModel, OllamaModel
-from app.models.chat import ChatRequest
+from testing_utils import make_req
+
+logger = logging.getLogger(__name__)
 
 
 class TestAIModel(MockAIModel):
@@ -40,7 +38,7 @@ class TestAIModel(MockAIModel):
         self.calls.append({"messages": messages, "kwargs": kwargs})
         
         # 模拟处理延迟
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(self.response_delay)
         
         # 模拟错误
         if self.call_count <= self.fail_count:
@@ -50,8 +48,7 @@ class TestAIModel(MockAIModel):
         if not messages:
             return "这是一个测试响应"
         
-        last_message = messages[-1]
-        content = last_message.content if hasattr(last_message, 'content') else ""
+        content = getattr(messages[-1], 'content', "")
         
         return f"测试响应: '{content}' (调用次数: {self.call_count})"
 
@@ -65,10 +62,7 @@ async def test_mock_model():
     workflow = ChatWorkflow(ai_model=model)
     
     # 测试基本消息处理
-    request = ChatRequest(
-        message="你好，这是一个测试",
-        conversation_id=None
-    )
+    request = make_req("你好，这是一个测试")
     
     response = await workflow.process_message(request)
     print(f"✓ 消息处理成功")
@@ -88,10 +82,7 @@ async def test_error_handling():
     workflow = ChatWorkflow(ai_model=model)
     
     # 测试消息处理
-    request = ChatRequest(
-        message="测试错误处理",
-        conversation_id=None
-    )
+    request = make_req("测试错误处理")
     
     try:
         response = await workflow.process_message(request)
@@ -119,19 +110,13 @@ async def test_context_passing():
     workflow = ChatWorkflow(ai_model=model)
     
     # 第一条消息
-    request1 = ChatRequest(
-        message="第一条测试消息",
-        conversation_id=None
-    )
+    request1 = make_req("第一条测试消息")
     
     response1 = await workflow.process_message(request1)
     conversation_id = response1.conversation_id
     
     # 第二条消息
-    request2 = ChatRequest(
-        message="第二条测试消息",
-        conversation_id=conversation_id
-    )
+    request2 = make_req("第二条测试消息", conversation_id)
     
     response2 = await workflow.process_message(request2)
     
@@ -153,6 +138,14 @@ async def test_context_passing():
     return True
 
 
+async def _timed(name, test_func):
+    """运行单个测试并记录耗时。"""
+    print(f"\n运行测试: {name}")
+    start_time = time.time()
+    success = await test_func()
+    return name, success, time.time() - start_time
+
+
 async def run_all_tests():
     """运行所有测试。"""
     print("开始测试AI模型集成...")
@@ -163,20 +156,21 @@ async def run_all_tests():
         ("上下文传递测试", test_context_passing)
     ]
     
-    results = []
+    # 各测试使用独立的工作流实例，互不共享状态，可以并发运行
+    results_raw = await asyncio.gather(
+        *(_timed(name, test_func) for name, test_func in tests),
+        return_exceptions=True
+    )
     
-    for name, test_func in tests:
-        print(f"\n运行测试: {name}")
-        try:
-            start_time = time.time()
-            success = await test_func()
-            duration = time.time() - start_time
-            results.append((name, success, duration))
-        except Exception as e:
-            import traceback
-            print(f"❌ 测试出错: {str(e)}")
-            traceback.print_exc()
+    results = []
+    for (name, _), result in zip(tests, results_raw):
+        if isinstance(result, Exception):
+            print(f"❌ 测试出错 {name}: {str(result)}")
+            # 堆栈仅在日志处理器实际输出时才格式化
+            logger.warning("测试 %s 失败", name, exc_info=result)
             results.append((name, False, 0))
+        else:
+            results.append(result)
     
     # 打印测试结果摘要
     print("\n测试结果摘要:")
@@ -2,24 +2,27 @@
 Comprehensive tests for the chat API endpoints
 """
 
+import asyncio
+
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
+from testing_utils import make_req, orjson_post, parse, register
+
+# 超过1000字符限制的消息，模块加载时构建一次
+_LONG_MSG = "x" * 1001
 
 
 class TestChatAPI:
     """Test suite for chat API endpoints"""
     
-    def test_chat_endpoint_basic_functionality(self):
+    async def test_chat_endpoint_basic_functionality(self, async_client):
         """测试基本聊天功能"""
         request_data = {
             "message": "Hello, how are you?",
-            "conversation_id": "test_conv_basic"
+            "conversation_id": register("test_conv_basic")
         }
         
-        response = client.post("/api/chat/", json=request_data)
+        response = await async_client.post("/api/chat/", json=request_data)
         assert response.status_code == 200
         
         data = response.json()
@@ -32,57 +35,60 @@ class TestChatAPI:
         assert len(data["response"]) > 0
         assert isinstance(data["processing_time"], (int, float))
     
-    def test_chat_endpoint_auto_conversation_id(self):
+    async def test_chat_endpoint_auto_conversation_id(self, async_client):
         """测试自动生成会话ID"""
         request_data = {
             "message": "Hello without conversation ID"
         }
         
-        response = client.post("/api/chat/", json=request_data)
+        response = await async_client.post("/api/chat/", json=request_data)
         assert response.status_code == 200
         
         data = response.json()
         assert "conversation_id" in data
         assert data["conversation_id"].startswith("conv_")
         assert len(data["conversation_id"]) > 5
+        register(data["conversation_id"])
     
-    def test_chat_endpoint_validation_errors(self):
+    async def test_chat_endpoint_validation_errors(self, async_client):
         """测试各种验证错误"""
         # 空消息
-        response = client.post("/api/chat/", json={"message": ""})
+        response = await async_client.post("/api/chat/", json={"message": ""})
         assert response.status_code == 422
         
         # 超长消息
-        long_message = "x" * 1001
-        response = client.post("/api/chat/", json={"message": long_message})
+        response = await async_client.post("/api/chat/", json={"message": _LONG_MSG})
         assert response.status_code == 422
         
         # 缺少消息字段
-        response = client.post("/api/chat/", json={"conversation_id": "test"})
+        response = await async_client.post("/api/chat/", json={"conversation_id": "test"})
         assert response.status_code == 422
         
         # 空JSON
-        response = client.post("/api/chat/", json={})
+        response = await async_client.post("/api/chat/", json={})
         assert response.status_code == 422
     
-    def test_conversation_history_endpoint(self):
+    async def test_conversation_history_endpoint(self, async_client):
         """测试会话历史获取"""
         # 先发送一些消息创建会话
-        conv_id = "test_history_conv"
+        conv_id = register("test_history_conv")
         messages = ["Hello", "How are you?", "What's the weather?"]
         
-        for msg in messages:
-            response = client.post("/api/chat/", json={
+        responses = await asyncio.gather(*(
+            orjson_post(async_client, "/api/chat/", {
                 "message": msg,
                 "conversation_id": conv_id
             })
+            for msg in messages
+        ))
+        for response in responses:
             assert response.status_code == 200
         
         # 获取会话历史
-        response = client.get(f"/api/chat/history/{conv_id}")
+        response = await async_client.get(f"/api/chat/history/{conv_id}")
         assert response.status_code == 200
         
-        data = response.json()
+        data = parse(response.content)
         assert "conversation_id" in data
         assert "messages" in data
         assert "message_count" in data
@@ -91,91 +97,94 @@ class TestChatAPI:
         assert isinstance(data["messages"], list)
         assert data["message_count"] > 0
     
-    def test_conversation_history_with_limit(self):
+    async def test_conversation_history_with_limit(self, async_client):
         """测试带限制的会话历史获取"""
-        conv_id = "test_limit_conv"
+        conv_id = register("test_limit_conv")
         
         # 发送多条消息
-        for i in range(5):
-            response = client.post("/api/chat/", json={
+        responses = await asyncio.gather(*(
+            orjson_post(async_client, "/api/chat/", {
                 "message": f"Message {i+1}",
                 "conversation_id": conv_id
             })
+            for i in range(5)
+        ))
+        for response in responses:
             assert response.status_code == 200
         
         # 获取限制数量的历史
-        response = client.get(f"/api/chat/history/{conv_id}?limit=3")
+        response = await async_client.get(f"/api/chat/history/{conv_id}?limit=3")
         assert response.status_code == 200
         
-        data = response.json()
+        data = parse(response.content)
         assert data["limit"] == 3
         assert len(data["messages"]) <= 3
     
-    def test_conversation_history_validation(self):
+    async def test_conversation_history_validation(self, async_client):
         """测试会话历史获取的验证"""
         # 空会话ID
-        response = client.get("/api/chat/history/")
+        response = await async_client.get("/api/chat/history/")
         assert response.status_code == 404  # FastAPI路由不匹配
         
         # 无效的limit参数
-        response = client.get("/api/chat/history/test_conv?limit=0")
+        response = await async_client.get("/api/chat/history/test_conv?limit=0")
         assert response.status_code == 400
         
-        response = client.get("/api/chat/history/test_conv?limit=101")
+        response = await async_client.get("/api/chat/history/test_conv?limit=101")
         assert response.status_code == 400
         
         # 不存在的会话ID（应该返回空列表，不是错误）
-        response = client.get("/api/chat/history/nonexistent_conv")
+        response = await async_client.get("/api/chat/history/nonexistent_conv")
         assert response.status_code == 200
         data = response.json()
         assert data["message_count"] == 0
     
-    def test_clear_conversation_endpoint(self):
+    async def test_clear_conversation_endpoint(self, async_client):
         """测试清除会话功能"""
         # 先创建一个会话
         conv_id = "test_clear_conv"
-        response = client.post("/api/chat/", json={
+        response = await async_client.post("/api/chat/", json={
             "message": "Hello for clearing",
             "conversation_id": conv_id
         })
         assert response.status_code == 200
         
         # 确认会话存在
-        response = client.get(f"/api/chat/history/{conv_id}")
+        response = await async_client.get(f"/api/chat/history/{conv_id}")
         assert response.status_code == 200
         data = response.json()
         assert data["message_count"] > 0
         
         # 清除会话
-        response = client.delete(f"/api/chat/history/{conv_id}")
+        response = await async_client.delete(f"/api/chat/history/{conv_id}")
         assert response.status_code == 200
         
         data = response.json()
         assert data["status"] == "success"
         assert conv_id in data["message"]
     
-    def test_clear_nonexistent_conversation(self):
+    async def test_clear_nonexistent_conversation(self, async_client):
         """测试清除不存在的会话"""
-        response = client.delete("/api/chat/history/nonexistent_conv")
+        response = await async_client.delete("/api/chat/history/nonexistent_conv")
         assert response.status_code == 404
     
-    def test_list_conversations_endpoint(self):
+    async def test_list_conversations_endpoint(self, async_client):
         """测试获取会话列表"""
         # 创建几个会话
-        conv_ids = ["list_test_1", "list_test_2", "list_test_3"]
+        conv_ids = [register(c) for c in ("list_test_1", "list_test_2", "list_test_3")]
         
         for conv_id in conv_ids:
-            response = client.post("/api/chat/", json={
+            response = await orjson_post(async_client, "/api/chat/", {
                 "message": f"Hello from {conv_id}",
                 "conversation_id": conv_id
             })
             assert response.status_code == 200
         
         # 获取会话列表
-        response = client.get("/api/chat/conversations")
+        response = await async_client.get("/api/chat/conversations")
         assert response.status_code == 200
         
-        data = response.json()
+        data = parse(response.content)
         assert "conversations" in data
         assert "total_count" in data
         assert "timestamp" in data
@@ -191,9 +200,9 @@ class TestChatAPI:
             assert "updated_at" in conv
             assert "last_message_preview" in conv
     
-    def test_chat_service_health_endpoint(self):
+    async def test_chat_service_health_endpoint(self, async_client):
         """测试聊天服务健康检查"""
-        response = client.get("/api/chat/health")
+        response = await async_client.get("/api/chat/health")
         assert response.status_code == 200
         
         data = response.json()
@@ -204,50 +213,86 @@ class TestChatAPI:
         assert "timestamp" in data
         assert isinstance(data["active_conversations"], int)
     
-    def test_conversation_context_persistence(self):
+    async def test_conversation_context_persistence(self, async_client):
         """测试会话上下文持久性"""
-        conv_id = "context_test_conv"
+        conv_id = register("context_test_conv")
         
         # 第一条消息
-        response1 = client.post("/api/chat/", json={
+        response1 = await async_client.post("/api/chat/", json={
             "message": "My name is Alice",
             "conversation_id": conv_id
         })
         assert response1.status_code == 200
         
         # 第二条消息，测试上下文是否保持
-        response2 = client.post("/api/chat/", json={
+        response2 = await async_client.post("/api/chat/", json={
             "message": "What is my name?",
             "conversation_id": conv_id
         })
         assert response2.status_code == 200
         
         # 检查会话历史
-        history_response = client.get(f"/api/chat/history/{conv_id}")
+        history_response = await async_client.get(f"/api/chat/history/{conv_id}")
         assert history_response.status_code == 200
         
         history_data = history_response.json()
         assert history_data["message_count"] >= 4  # 2 user + 2 AI messages
     
-    def test_multiple_concurrent_conversations(self):
+    async def test_multiple_concurrent_conversations(self, async_client):
         """测试多个并发会话"""
-        conv_ids = ["concurrent_1", "concurrent_2", "concurrent_3"]
+        conv_ids = [register(c) for c in ("concurrent_1", "concurrent_2", "concurrent_3")]
         
         # 并发创建多个会话
-        for conv_id in conv_ids:
-            response = client.post("/api/chat/", json={
+        responses = await asyncio.gather(*(
+            orjson_post(async_client, "/api/chat/", {
                 "message": f"Hello from conversation {conv_id}",
                 "conversation_id": conv_id
             })
+            for conv_id in conv_ids
+        ))
+        for response in responses:
             assert response.status_code == 200
         
         # 验证每个会话都独立存在
         for conv_id in conv_ids:
-            response = client.get(f"/api/chat/history/{conv_id}")
+            response = await async_client.get(f"/api/chat/history/{conv_id}")
             assert response.status_code == 200
-            data = response.json()
+            data = parse(response.content)
             assert data["conversation_id"] == conv_id
             assert data["message_count"] > 0
+    
+    async def test_stream_rejected_while_conversation_streaming(self, async_client):
+        """测试同一会话正在流式处理时，第二个流式请求返回concurrent_streaming错误"""
+        from app.routes.chat import chat_workflow
+        
+        conv_id = register("api_busy_stream_conv")
+        
+        # 第一个流直接在工作流上推进到AI开始输出，此时会话处于流式保护之下
+        first_stream = chat_workflow.process_message_stream(make_req("第一个流式请求", conv_id))
+        async for chunk in first_stream:
+            if chunk.type == "chunk":
+                break
+        
+        try:
+            # 通过API发起第二个流式请求
+            response = await orjson_post(async_client, "/api/chat/stream", {
+                "message": "第二个流式请求",
+                "conversation_id": conv_id
+            })
+            assert response.status_code == 200
+            chunks = [
+                parse(line[6:])
+                for line in response.content.splitlines()
+                if line.startswith(b"data: ")
+            ]
+            assert chunks[-1]["type"] == "error"
+            assert chunks[-1]["metadata"]["error_category"] == "concurrent_streaming"
+        finally:
+            async for _ in first_stream:
+                pass
+        
+        # 第一个流结束后同一会话可以再次流式处理
+        assert not chat_workflow.is_conversation_streaming(conv_id)
 
 
 if __name__ == "__main__":
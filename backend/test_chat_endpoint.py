@@ -3,18 +3,19 @@ Chat endpoint functionality test
 """
 
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
+from testing_utils import register
 
+# 超过1000字符限制的消息，模块加载时构建一次
+_LONG_MSG = "x" * 1001
 
-def test_chat_endpoint_with_valid_request():
+
+def test_chat_endpoint_with_valid_request(client):
     """测试聊天端点的正常功能"""
     # 发送有效的聊天请求
     request_data = {
         "message": "Hello, how are you?",
-        "conversation_id": "test_conv_123"
+        "conversation_id": register("test_conv_123")
     }
     
     response = client.post("/api/chat/", json=request_data)
@@ -29,7 +30,7 @@ def test_chat_endpoint_with_valid_request():
     assert len(data["response"]) > 0
 
 
-def test_chat_endpoint_without_conversation_id():
+def test_chat_endpoint_without_conversation_id(client):
     """测试没有会话ID的聊天请求"""
     request_data = {
         "message": "Hello, this is a test message"
@@ -44,9 +45,10 @@ def test_chat_endpoint_without_conversation_id():
     assert "timestamp" in data
     # 应该自动生成会话ID
     assert data["conversation_id"].startswith("conv_")
+    register(data["conversation_id"])
 
 
-def test_chat_endpoint_with_empty_message():
+def test_chat_endpoint_with_empty_message(client):
     """测试空消息的聊天请求"""
     request_data = {
         "message": "",
@@ -57,11 +59,10 @@ def test_chat_endpoint_with_empty_message():
     assert response.status_code == 422  # Validation error
 
 
-def test_chat_endpoint_with_long_message():
+def test_chat_endpoint_with_long_message(client):
     """测试超长消息的聊天请求"""
-    long_message = "x" * 1001  # 超过1000字符限制
     request_data = {
-        "message": long_message,
+        "message": _LONG_MSG,
         "conversation_id": "test_conv_long"
     }
     
@@ -69,7 +70,7 @@ def test_chat_endpoint_with_long_message():
     assert response.status_code == 422  # Validation error
 
 
-def test_chat_endpoint_missing_message():
+def test_chat_endpoint_missing_message(client):
     """测试缺少消息字段的请求"""
     request_data = {
         "conversation_id": "test_conv_missing"
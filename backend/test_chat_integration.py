@@ -2,31 +2,32 @@
 Integration test for the complete chat API workflow
 """
 
+import asyncio
+
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
+# 超过1000字符限制的消息，模块加载时构建一次
+_LONG_MSG = "x" * 1001
 
 
-def test_complete_chat_workflow():
+async def test_complete_chat_workflow(async_client):
     """测试完整的聊天工作流程"""
-    
-    # 1. 检查服务健康状态
-    health_response = client.get("/api/chat/health")
-    assert health_response.status_code == 200
-    health_data = health_response.json()
-    assert health_data["status"] == "healthy"
-    print(f"✓ 服务健康检查通过: {health_data['service']}")
-    
-    # 2. 发送第一条消息，创建新会话
     conv_id = "integration_test_conv"
     first_message = {
         "message": "Hello, I'm testing the chat API. Please remember my name is Alice.",
         "conversation_id": conv_id
     }
     
-    response1 = client.post("/api/chat/", json=first_message)
+    # 1. 检查服务健康状态，同时 2. 发送第一条消息，创建新会话（两者互不依赖）
+    health_response, response1 = await asyncio.gather(
+        async_client.get("/api/chat/health"),
+        async_client.post("/api/chat/", json=first_message)
+    )
+    assert health_response.status_code == 200
+    health_data = health_response.json()
+    assert health_data["status"] == "healthy"
+    print(f"✓ 服务健康检查通过: {health_data['service']}")
+    
     assert response1.status_code == 200
     data1 = response1.json()
     assert data1["conversation_id"] == conv_id
@@ -40,14 +41,21 @@ def test_complete_chat_workflow():
         "conversation_id": conv_id
     }
     
-    response2 = client.post("/api/chat/", json=second_message)
+    # 第二条消息依赖第一条的上下文，必须顺序发送
+    response2 = await async_client.post("/api/chat/", json=second_message)
     assert response2.status_code == 200
     data2 = response2.json()
     assert data2["conversation_id"] == conv_id
     print(f"✓ 第二条消息发送成功，测试上下文保持")
     
+    # 4-6. 历史、会话列表和限制历史都是只读查询，并发获取
+    history_response, conversations_response, limited_history = await asyncio.gather(
+        async_client.get(f"/api/chat/history/{conv_id}"),
+        async_client.get("/api/chat/conversations"),
+        async_client.get(f"/api/chat/history/{conv_id}?limit=2")
+    )
+    
     # 4. 获取会话历史
-    history_response = client.get(f"/api/chat/history/{conv_id}")
     assert history_response.status_code == 200
     history_data = history_response.json()
     assert history_data["conversation_id"] == conv_id
@@ -55,7 +63,6 @@ def test_complete_chat_workflow():
     print(f"✓ 会话历史获取成功，消息数量: {history_data['message_count']}")
     
     # 5. 检查会话列表
-    conversations_response = client.get("/api/chat/conversations")
     assert conversations_response.status_code == 200
     conversations_data = conversations_response.json()
     assert conversations_data["total_count"] >= 1
@@ -72,7 +79,6 @@ def test_complete_chat_workflow():
     print(f"✓ 会话列表检查通过，总会话数: {conversations_data['total_count']}")
     
     # 6. 测试会话历史限制
-    limited_history = client.get(f"/api/chat/history/{conv_id}?limit=2")
     assert limited_history.status_code == 200
     limited_data = limited_history.json()
     assert limited_data["limit"] == 2
@@ -80,14 +86,14 @@ def test_complete_chat_workflow():
     print(f"✓ 限制历史记录功能正常，返回消息数: {len(limited_data['messages'])}")
     
     # 7. 清除会话
-    clear_response = client.delete(f"/api/chat/history/{conv_id}")
+    clear_response = await async_client.delete(f"/api/chat/history/{conv_id}")
     assert clear_response.status_code == 200
     clear_data = clear_response.json()
     assert clear_data["status"] == "success"
     print(f"✓ 会话清除成功")
     
     # 8. 验证会话已被清除
-    cleared_history = client.get(f"/api/chat/history/{conv_id}")
+    cleared_history = await async_client.get(f"/api/chat/history/{conv_id}")
     assert cleared_history.status_code == 200
     cleared_data = cleared_history.json()
     assert cleared_data["message_count"] == 0
@@ -96,39 +102,36 @@ def test_complete_chat_workflow():
     print("\n🎉 完整的聊天API工作流程测试通过！")
 
 
-def test_error_handling_workflow():
+@pytest.mark.parametrize("invalid_request", [
+    {},  # 空请求
+    {"message": ""},  # 空消息
+    {"message": _LONG_MSG},  # 超长消息
+    {"conversation_id": "test"}  # 缺少消息
+])
+def test_invalid_request_handling(client, invalid_request):
+    """测试无效请求返回422错误"""
+    response = client.post("/api/chat/", json=invalid_request)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("limit", [0, 101, -1])
+def test_invalid_history_limit_handling(client, limit):
+    """测试无效的历史查询参数返回400错误"""
+    response = client.get(f"/api/chat/history/test_conv?limit={limit}")
+    assert response.status_code == 400
+
+
+def test_error_handling_workflow(client):
     """测试错误处理工作流程"""
     
-    # 1. 测试无效请求
-    invalid_requests = [
-        {},  # 空请求
-        {"message": ""},  # 空消息
-        {"message": "x" * 1001},  # 超长消息
-        {"conversation_id": "test"}  # 缺少消息
-    ]
-    
-    for i, invalid_request in enumerate(invalid_requests):
-        response = client.post("/api/chat/", json=invalid_request)
-        assert response.status_code == 422, f"无效请求 {i+1} 应该返回422错误"
-    
-    print("✓ 无效请求错误处理正常")
-    
-    # 2. 测试不存在的会话历史
+    # 1. 测试不存在的会话历史
     response = client.get("/api/chat/history/nonexistent_conv")
     assert response.status_code == 200
     data = response.json()
     assert data["message_count"] == 0
     print("✓ 不存在会话的历史查询处理正常")
     
-    # 3. 测试无效的历史查询参数
-    invalid_limits = [0, 101, -1]
-    for limit in invalid_limits:
-        response = client.get(f"/api/chat/history/test_conv?limit={limit}")
-        assert response.status_code == 400, f"无效limit {limit} 应该返回400错误"
-    
-    print("✓ 无效参数错误处理正常")
-    
-    # 4. 测试清除不存在的会话
+    # 2. 测试清除不存在的会话
     response = client.delete("/api/chat/history/nonexistent_conv")
     assert response.status_code == 404
     print("✓ 清除不存在会话的错误处理正常")
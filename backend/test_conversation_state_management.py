@@ -10,21 +10,23 @@
 
 import asyncio
 import pytest
+import pytest_asyncio
 import threading
 import time
 from unittest.mock import AsyncMock, MagicMock
 from concurrent.futures import ThreadPoolExecutor
 
+from app.config import settings
 from app.chat.workflow import ChatWorkflow
-from app.models.chat import ChatRequest
+from testing_utils import make_req
 from app.models.message import MessageType
 
 
 class MockAIModel:
     """模拟AI模型用于测试"""
     
-    def __init__(self, response_delay=0.1, chunk_count=5):
-        self.response_delay = response_delay
+    def __init__(self, response_delay=None, chunk_count=5):
+        self.response_delay = response_delay if response_delay is not None else settings.MOCK_AI_DELAY
         self.chunk_count = chunk_count
     
     async def generate_response(self, messages):
@@ -43,26 +45,56 @@ class MockAIModel:
         return {"model": "test-model", "version": "1.0"}
 
 
-@pytest.fixture
-def workflow():
-    """创建测试用的工作流实例"""
+@pytest_asyncio.fixture(scope="session")
+async def workflow():
+    """创建测试用的工作流实例（整个测试会话共享，各测试使用不同的会话ID隔离）"""
     mock_model = MockAIModel()
     workflow = ChatWorkflow(ai_model=mock_model)
+    await workflow.async_setup()
     return workflow
 
 
-@pytest.mark.asyncio
+async def _drain_stream(workflow, request):
+    """
+    消费完整的流式响应。
+    
+    Returns:
+        (拼接后的完整响应, 结束事件块或None, 所有收到的块)
+    """
+    chunks = []
+    parts = []
+    end_chunk = None
+    append_chunk = chunks.append
+    append_part = parts.append
+    async for chunk in workflow.process_message_stream(request):
+        append_chunk(chunk)
+        chunk_type = chunk.type
+        if chunk_type == "chunk":
+            append_part(chunk.content)
+        elif chunk_type == "end":
+            end_chunk = chunk
+    return "".join(parts), end_chunk, chunks
+
+
+async def _advance_to_first_chunk(stream):
+    """
+    推进流直到收到第一个内容块。
+    
+    此时用户消息已写入、AI流式调用已开始，会话处于流式保护之下，
+    可作为并发测试的确定性同步点。
+    """
+    async for chunk in stream:
+        if chunk.type == "chunk":
+            return chunk
+    raise AssertionError("流在产生内容块之前结束")
+
+
 async def test_conversation_state_consistency_streaming_vs_non_streaming(workflow):
     """测试流式和非流式模式之间的会话状态一致性"""
-    await workflow.async_setup()
-    
     conversation_id = "test_consistency_conv"
     
     # 1. 发送非流式消息
-    non_stream_request = ChatRequest(
-        message="这是非流式消息",
-        conversation_id=conversation_id
-    )
+    non_stream_request = make_req("这是非流式消息", conversation_id)
     
     non_stream_response = await workflow.process_message(non_stream_request)
     assert non_stream_response.conversation_id == conversation_id
@@ -75,20 +107,13 @@ async def test_conversation_state_consistency_streaming_vs_non_streaming(workflo
     assert conversation.messages[1].type == MessageType.AI
     
     # 2. 发送流式消息
-    stream_request = ChatRequest(
-        message="这是流式消息",
-        conversation_id=conversation_id
-    )
-    
-    full_response = ""
-    chunk_count = 0
-    async for chunk in workflow.process_message_stream(stream_request):
-        if chunk.type == "chunk":
-            full_response += chunk.content
-            chunk_count += 1
-        elif chunk.type == "end":
-            assert chunk.metadata["status"] == "completed"
-            assert chunk.metadata["conversation_updated"] is True
+    stream_request = make_req("这是流式消息", conversation_id)
+    
+    full_response, end_chunk, chunks = await _drain_stream(workflow, stream_request)
+    chunk_count = sum(1 for chunk in chunks if chunk.type == "chunk")
+    assert end_chunk is not None
+    assert end_chunk.metadata["status"] == "completed"
+    assert end_chunk.metadata["conversation_updated"] is True
     
     # 验证流式处理后的会话状态
     updated_conversation = workflow.get_conversation(conversation_id)
@@ -96,7 +121,7 @@ async def test_conversation_state_consistency_streaming_vs_non_streaming(workflo
     assert len(updated_conversation.messages) == 4  # 原有2条 + 新的用户消息 + AI响应
     
     # 验证消息顺序和内容
-    messages = updated_conversation.get_recent_messages(limit=4)
+    messages = updated_conversation.recent_messages_view(limit=4)
     assert messages[0].type == MessageType.AI  # 最新的AI响应
     assert messages[1].type == MessageType.USER  # 流式用户消息
     assert messages[2].type == MessageType.AI  # 非流式AI响应
@@ -107,31 +132,19 @@ async def test_conversation_state_consistency_streaming_vs_non_streaming(workflo
     assert chunk_count > 0
 
 
-@pytest.mark.asyncio
 async def test_concurrent_streaming_prevention(workflow):
     """测试防止同一会话的并发流式处理"""
-    await workflow.async_setup()
-    
     conversation_id = "test_concurrent_conv"
     
     # 创建两个并发的流式请求
-    request1 = ChatRequest(
-        message="第一个流式请求",
-        conversation_id=conversation_id
-    )
+    request1 = make_req("第一个流式请求", conversation_id)
     
-    request2 = ChatRequest(
-        message="第二个流式请求",
-        conversation_id=conversation_id
-    )
+    request2 = make_req("第二个流式请求", conversation_id)
     
-    # 启动第一个流式处理
-    stream1_task = asyncio.create_task(
-        workflow.process_message_stream(request1).__anext__()
-    )
-    
-    # 等待一小段时间确保第一个流开始
-    await asyncio.sleep(0.05)
+    # 启动第一个流式处理，并推进到流式保护生效的位置
+    stream1 = workflow.process_message_stream(request1)
+    await _advance_to_first_chunk(stream1)
+    assert workflow.is_conversation_streaming(conversation_id)
     
     # 尝试启动第二个流式处理（应该被拒绝）
     error_found = False
@@ -143,44 +156,33 @@ async def test_concurrent_streaming_prevention(workflow):
     
     assert error_found, "并发流式请求应该被拒绝"
     
-    # 清理第一个任务
-    stream1_task.cancel()
-    try:
-        await stream1_task
-    except asyncio.CancelledError:
-        pass
+    # 第一个流应正常完成
+    end_chunk = None
+    async for chunk in stream1:
+        if chunk.type == "end":
+            end_chunk = chunk
+    assert end_chunk is not None
 
 
-@pytest.mark.asyncio
 async def test_conversation_state_after_streaming_completion(workflow):
     """测试流式处理完成后会话状态的正确更新"""
-    await workflow.async_setup()
-    
     conversation_id = "test_completion_conv"
-    request = ChatRequest(
-        message="测试流式完成后的状态",
-        conversation_id=conversation_id
-    )
+    request = make_req("测试流式完成后的状态", conversation_id)
     
     # 记录流式处理前的状态
     initial_conversation = workflow.get_conversation(conversation_id)
     assert initial_conversation is None
     
     # 执行流式处理
-    chunks_received = []
-    full_response = ""
+    full_response, end_chunk, _ = await _drain_stream(workflow, request)
     
-    async for chunk in workflow.process_message_stream(request):
-        chunks_received.append(chunk)
-        if chunk.type == "chunk":
-            full_response += chunk.content
-        elif chunk.type == "end":
-            # 验证结束事件的元数据
-            assert "processing_time" in chunk.metadata
-            assert "total_chunks" in chunk.metadata
-            assert "full_response_length" in chunk.metadata
-            assert chunk.metadata["status"] == "completed"
-            assert chunk.metadata["conversation_updated"] is True
+    # 验证结束事件的元数据
+    assert end_chunk is not None
+    assert "processing_time" in end_chunk.metadata
+    assert "total_chunks" in end_chunk.metadata
+    assert "full_response_length" in end_chunk.metadata
+    assert end_chunk.metadata["status"] == "completed"
+    assert end_chunk.metadata["conversation_updated"] is True
     
     # 验证流式处理完成后的会话状态
     final_conversation = workflow.get_conversation(conversation_id)
@@ -206,19 +208,13 @@ async def test_conversation_state_after_streaming_completion(workflow):
     assert not workflow.is_conversation_streaming(conversation_id)
 
 
-@pytest.mark.asyncio
 async def test_thread_safety_with_concurrent_operations(workflow):
     """测试并发操作的线程安全性"""
-    await workflow.async_setup()
-    
     conversation_id = "test_thread_safety_conv"
     
     # 定义并发操作
     async def add_non_stream_message(msg_num):
-        request = ChatRequest(
-            message=f"非流式消息 {msg_num}",
-            conversation_id=conversation_id
-        )
+        request = make_req(f"非流式消息 {msg_num}", conversation_id)
         return await workflow.process_message(request)
     
     def get_conversation_info():
@@ -250,36 +246,22 @@ async def test_thread_safety_with_concurrent_operations(workflow):
     
     # 使用线程池测试线程安全的读操作
     with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = []
-        for _ in range(10):
-            futures.append(executor.submit(get_conversation_info))
-            futures.append(executor.submit(get_history))
-        
-        # 所有读操作应该返回一致的结果
-        results = [future.result() for future in futures]
-        message_counts = [r for i, r in enumerate(results) if i % 2 == 0]
-        history_counts = [r for i, r in enumerate(results) if i % 2 == 1]
+        message_counts = list(executor.map(lambda _: get_conversation_info(), range(10)))
+        history_counts = list(executor.map(lambda _: get_history(), range(10)))
         
         # 所有读取应该返回相同的消息数量
         assert all(count == message_counts[0] for count in message_counts)
         assert all(count == history_counts[0] for count in history_counts)
 
 
-@pytest.mark.asyncio
 async def test_conversation_cleanup_during_streaming(workflow):
     """测试流式处理期间的会话清理保护"""
-    await workflow.async_setup()
-    
     conversation_id = "test_cleanup_protection_conv"
-    request = ChatRequest(
-        message="测试清理保护",
-        conversation_id=conversation_id
-    )
+    request = make_req("测试清理保护", conversation_id)
     
-    # 启动流式处理
+    # 启动流式处理，推进到AI开始输出（流式保护覆盖AI调用和保存阶段）
     stream_gen = workflow.process_message_stream(request)
-    first_chunk = await stream_gen.__anext__()
-    assert first_chunk.type == "start"
+    await _advance_to_first_chunk(stream_gen)
     
     # 验证会话正在流式处理
     assert workflow.is_conversation_streaming(conversation_id)
@@ -8,6 +8,8 @@
 import sys
 import os
 
+import pytest
+
 # 添加项目路径到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 
@@ -15,6 +17,12 @@ from app.config import settings
 from app.chat.ai_providers import create_default_model
 
 
+@pytest.fixture(scope="session")
+def default_model():
+    """整个测试会话共享的默认AI模型实例"""
+    return create_default_model()
+
+
 def test_config():
     """测试配置加载"""
     print("=== 环境变量配置测试 ===")
@@ -42,19 +50,15 @@ def test_config():
     print()
 
 
-def test_ai_model_creation():
+def test_ai_model_creation(default_model):
     """测试AI模型创建"""
     print("=== AI模型创建测试 ===")
     try:
-        model = create_default_model()
+        model = default_model
         print(f"默认AI模型类型: {type(model).__name__}")
         
-        # 获取模型信息
-        import asyncio
-        async def get_model_info():
-            return await model.get_model_info()
-        
-        model_info = asyncio.run(get_model_info())
+        # 获取模型信息（同步访问，无需启动事件循环）
+        model_info = model.model_info
         print("模型信息:")
         for key, value in model_info.items():
             print(f"  {key}: {value}")
@@ -69,7 +73,7 @@ def main():
     print("开始环境变量配置测试...\n")
     
     test_config()
-    test_ai_model_creation()
+    test_ai_model_creation(create_default_model())
     
     print("环境变量配置测试完成！")
 
@@ -2,14 +2,13 @@
 FastAPI应用基础测试
 """
 
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
+from testing_utils import register
 
 
-def test_root_endpoint():
+def test_root_endpoint(client):
     """测试根路径端点"""
     response = client.get("/")
     assert response.status_code == 200
@@ -21,7 +20,7 @@ def test_root_endpoint():
     assert data["status"] == "running"
 
 
-def test_health_check():
+def test_health_check(client):
     """测试健康检查端点"""
     response = client.get("/api/health")
     assert response.status_code == 200
@@ -30,7 +29,7 @@ def test_health_check():
     assert data["service"] == "ai-ui-backend"
 
 
-def test_status_endpoint():
+def test_status_endpoint(client):
     """测试状态端点"""
     response = client.get("/api/status")
     assert response.status_code == 200
@@ -41,9 +40,40 @@ def test_status_endpoint():
     assert "environment" in data
 
 
-def test_chat_endpoint_exists():
+def test_chat_endpoint_exists(client):
     """测试聊天端点存在性（不测试功能）"""
     # 只测试端点是否存在，不测试实际功能
     # 发送一个空请求，预期会返回400错误（而不是404）
     response = client.post("/api/chat/", json={})
-    assert response.status_code == 422  # Pydantic验证错误
\ No newline at end of file
+    assert response.status_code == 422  # Pydantic验证错误
+
+
+async def test_chat_stream_endpoint(async_client):
+    """
+    测试流式聊天端点（httpx异步流式读取SSE）。
+    
+    服务端用Pydantic的model_dump_json编码每个块：媒体类型保持text/event-stream，
+    中文内容以UTF-8原样发送而不是\\u转义。
+    """
+    chunk_types = []
+    conversation_id = None
+    async with async_client.stream(
+        "POST",
+        "/api/chat/stream",
+        json={"message": "你好"},
+        headers={"Accept": "text/event-stream"}
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                assert "\\u" not in line
+                chunk = orjson.loads(line[6:])
+                chunk_types.append(chunk["type"])
+                conversation_id = chunk["conversation_id"]
+    
+    assert chunk_types, "未收到任何SSE data行"
+    register(conversation_id)
+    assert chunk_types[0] == "start"
+    assert chunk_types[-1] == "end"
+    assert "chunk" in chunk_types
@@ -3,72 +3,110 @@
 测试流式聊天功能的脚本。
 """
 
-import asyncio
+import aiohttp
 import httpx
-import json
+import orjson
+from contextlib import nullcontext
 from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from testing_utils import run_script
+
+# 测试请求体在模块加载时序列化一次，各请求直接复用字节
+TEST_MESSAGE = "你好，请介绍一下你自己"
+REQUEST_BODY = orjson.dumps({"message": TEST_MESSAGE, "conversation_id": None})
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_STREAM_HEADERS = {**_JSON_HEADERS, "Accept": "text/event-stream"}
+
+_DATA_PREFIX = b"data: "
+
+
+def _data_payload(line: bytearray) -> Optional[memoryview]:
+    """data行返回去掉前缀和行尾的负载视图，其他行（空行、注释等）返回None"""
+    if not line.startswith(_DATA_PREFIX):
+        return None
+    return memoryview(line.rstrip(b"\r"))[len(_DATA_PREFIX):]
+
+
+async def iter_sse_data(stream: aiohttp.StreamReader) -> AsyncIterator[memoryview]:
+    """
+    从响应流中逐个取出SSE data行的负载。
+    
+    收到的原始字节块累积在缓冲区中按换行切分，不对每行做str解码，
+    返回的memoryview可以直接交给orjson解析。
+    
+    Args:
+        stream: aiohttp响应的content流
+        
+    Yields:
+        每个data行的负载字节
+    """
+    buf = bytearray()
+    async for data in stream.iter_any():
+        buf += data
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            payload = _data_payload(line)
+            if payload is not None:
+                yield payload
+    
+    # 流结束时最后一行可能没有换行符
+    payload = _data_payload(buf)
+    if payload is not None:
+        yield payload
 
 
 async def test_stream_chat():
     """测试流式聊天端点"""
     
-    # 测试数据
-    test_request = {
-        "message": "你好，请介绍一下你自己",
-        "conversation_id": None
-    }
-    
     print(f"[{datetime.now()}] 开始测试流式聊天...")
-    print(f"发送消息: {test_request['message']}")
+    print(f"发送消息: {TEST_MESSAGE}")
     print("-" * 50)
     
     try:
-        async with httpx.AsyncClient() as client:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
             # 发送流式请求
-            async with client.stream(
-                "POST",
+            async with session.post(
                 "http://localhost:8000/api/chat/stream",
-                json=test_request,
-                headers={"Accept": "text/event-stream"}
+                data=REQUEST_BODY,
+                headers=_STREAM_HEADERS
             ) as response:
                 
-                if response.status_code != 200:
-                    print(f"错误: HTTP {response.status_code}")
-                    print(await response.aread())
+                if response.status != 200:
+                    print(f"错误: HTTP {response.status}")
+                    print(await response.read())
                     return
                 
                 print("开始接收流式响应:")
-                full_response = ""
+                parts = []
                 
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data_str = line[6:]  # 移除 "data: " 前缀
+                async for data_str in iter_sse_data(response.content):
+                    try:
+                        chunk_data = orjson.loads(data_str)
+                        chunk_type = chunk_data.get("type")
+                        content = chunk_data.get("content", "")
+                        conversation_id = chunk_data.get("conversation_id")
                         
-                        try:
-                            chunk_data = json.loads(data_str)
-                            chunk_type = chunk_data.get("type")
-                            content = chunk_data.get("content", "")
-                            conversation_id = chunk_data.get("conversation_id")
+                        if chunk_type == "start":
+                            print(f"[开始] 会话ID: {conversation_id}")
+                            
+                        elif chunk_type == "chunk":
+                            print(f"[块] {content}", end="", flush=True)
+                            parts.append(content)
                             
-                            if chunk_type == "start":
-                                print(f"[开始] 会话ID: {conversation_id}")
-                                
-                            elif chunk_type == "chunk":
-                                print(f"[块] {content}", end="", flush=True)
-                                full_response += content
-                                
-                            elif chunk_type == "end":
-                                metadata = chunk_data.get("metadata", {})
-                                processing_time = metadata.get("processing_time", 0)
-                                total_chunks = metadata.get("total_chunks", 0)
-                                print(f"\n[结束] 处理时间: {processing_time}s, 总块数: {total_chunks}")
-                                
-                            elif chunk_type == "error":
-                                print(f"\n[错误] {content}")
-                                
-                        except json.JSONDecodeError as e:
-                            print(f"\n[JSON解析错误] {e}: {data_str}")
+                        elif chunk_type == "end":
+                            metadata = chunk_data.get("metadata", {})
+                            processing_time = metadata.get("processing_time", 0)
+                            total_chunks = metadata.get("total_chunks", 0)
+                            print(f"\n[结束] 处理时间: {processing_time}s, 总块数: {total_chunks}")
+                            
+                        elif chunk_type == "error":
+                            print(f"\n[错误] {content}")
+                            
+                    except orjson.JSONDecodeError as e:
+                        print(f"\n[JSON解析错误] {e}: {bytes(data_str).decode('utf-8', errors='replace')}")
                 
+                full_response = "".join(parts)
                 print(f"\n{'-' * 50}")
                 print(f"完整响应: {full_response}")
                 
@@ -76,23 +114,24 @@ async def test_stream_chat():
         print(f"测试失败: {str(e)}")
 
 
-async def test_regular_chat():
-    """测试常规聊天端点作为对比"""
+async def test_regular_chat(http_client: Optional[httpx.AsyncClient] = None):
+    """
+    测试常规聊天端点作为对比。
     
-    test_request = {
-        "message": "你好，请介绍一下你自己",
-        "conversation_id": None
-    }
+    Args:
+        http_client: 复用的HTTP客户端（连接池跨请求保持）；为None时临时创建一个
+    """
     
     print(f"\n[{datetime.now()}] 开始测试常规聊天...")
-    print(f"发送消息: {test_request['message']}")
+    print(f"发送消息: {TEST_MESSAGE}")
     print("-" * 50)
     
     try:
-        async with httpx.AsyncClient() as client:
+        async with nullcontext(http_client) if http_client is not None else httpx.AsyncClient() as client:
             response = await client.post(
                 "http://localhost:8000/api/chat/",
-                json=test_request
+                content=REQUEST_BODY,
+                headers=_JSON_HEADERS
             )
             
             if response.status_code == 200:
@@ -114,14 +153,16 @@ async def main():
     print("流式聊天功能测试")
     print("=" * 60)
     
-    # 测试流式聊天
-    await test_stream_chat()
-    
-    # 测试常规聊天作为对比
-    await test_regular_chat()
+    # 整个运行期间共享一个HTTP客户端，退出时关闭
+    async with httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=20)) as http_client:
+        # 测试流式聊天
+        await test_stream_chat()
+        
+        # 测试常规聊天作为对比
+        await test_regular_chat(http_client)
     
     print("\n测试完成!")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_script(main)
\ No newline at end of file
@@ -17,6 +17,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 from langchain_core.messages import HumanMessage
 from app.chat.ai_providers import MoonshotModel, OpenAIModel, OllamaModel
 from app.chat.ai_models import MockAIModel
+from testing_utils import run_script
+
+# 所有模型共用的测试消息，模块加载时构建一次
+TEST_MESSAGES = (HumanMessage(content="你好，请简单介绍一下你自己。"),)
 
 
 async def test_model_streaming(model, model_name: str):
@@ -29,11 +33,6 @@ async def test_model_streaming(model, model_name: str):
     """
     print(f"\n=== 测试 {model_name} 流式响应 ===")
     
-    # 准备测试消息
-    test_messages = [
-        HumanMessage(content="你好，请简单介绍一下你自己。")
-    ]
-    
     try:
         # 检查模型是否有generate_response_stream方法
         if not hasattr(model, 'generate_response_stream'):
@@ -44,18 +43,20 @@ async def test_model_streaming(model, model_name: str):
         
         # 测试流式响应
         chunks_received = 0
-        total_content = ""
+        parts = []
         
         print(f"📡 {model_name}: 开始流式调用...")
         
-        async for chunk in model.generate_response_stream(test_messages):
+        async for chunk in model.generate_response_stream(list(TEST_MESSAGES)):
             if chunk:  # 检查chunk不为空
                 chunks_received += 1
-                total_content += chunk
+                parts.append(chunk)
                 print(f"📦 {model_name}: 收到chunk #{chunks_received}: '{chunk[:50]}{'...' if len(chunk) > 50 else ''}'")
             else:
                 print(f"⚠️  {model_name}: 收到空chunk")
         
+        total_content = "".join(parts)
+        
         # 验证结果
         if chunks_received == 0:
             print(f"❌ {model_name}: 没有收到任何chunk")
@@ -88,16 +89,19 @@ async def main():
         (OllamaModel(), "OllamaModel"),
     ]
     
-    results = []
+    # 各模型的调用互不依赖，并发测试以重叠网络等待时间
+    outcomes = await asyncio.gather(
+        *(test_model_streaming(model, model_name) for model, model_name in models_to_test),
+        return_exceptions=True
+    )
     
-    # 测试每个模型
-    for model, model_name in models_to_test:
-        try:
-            result = await test_model_streaming(model, model_name)
-            results.append((model_name, result))
-        except Exception as e:
-            print(f"❌ {model_name}: 测试过程中发生异常 - {str(e)}")
+    results = []
+    for (_, model_name), outcome in zip(models_to_test, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"❌ {model_name}: 测试过程中发生异常 - {str(outcome)}")
             results.append((model_name, False))
+        else:
+            results.append((model_name, outcome))
     
     # 汇总结果
     print("\n" + "="*60)
@@ -126,5 +130,5 @@ async def main():
 
 
 if __name__ == "__main__":
-    success = asyncio.run(main())
+    success = run_script(main)
     sys.exit(0 if success else 1)
\ No newline at end of file
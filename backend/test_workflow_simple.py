@@ -2,7 +2,6 @@
 Simple test script to verify the ChatWorkflow implementation.
 """
 
-import asyncio
 import sys
 import os
 
@@ -11,6 +10,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.chat.workflow import ChatWorkflow
 from app.models.chat import ChatRequest
+from testing_utils import run_script
 
 
 async def test_basic_workflow():
@@ -75,5 +75,5 @@ async def test_basic_workflow():
 
 
 if __name__ == "__main__":
-    success = asyncio.run(test_basic_workflow())
+    success = run_script(test_basic_workflow)
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+测试辅助函数
+
+供各测试模块直接导入的普通模块（pytest的conftest不应被当作模块导入）。
+"""
+
+import asyncio
+from typing import Optional
+
+import orjson
+
+from app.models.chat import ChatRequest
+
+try:
+    import uvloop
+except ImportError:  # uvloop不支持Windows，回退到标准事件循环
+    uvloop = None
+
+# 事件循环工厂：有uvloop时使用uvloop，否则为None（asyncio默认循环）
+LOOP_FACTORY = uvloop.new_event_loop if uvloop is not None else None
+
+# 预先构建并验证一次的请求模板，测试中通过model_copy覆盖字段，跳过重复的验证
+_TEMPLATE = ChatRequest(message="x", conversation_id="x")
+
+
+def make_req(message: str, conversation_id: Optional[str] = None) -> ChatRequest:
+    """
+    基于模板快速构建ChatRequest。
+    
+    model_copy不会重新验证字段（不去除首尾空白、不检查长度），
+    调用方必须传入本身已合法的消息；需要验证行为的测试请直接构造ChatRequest。
+    """
+    return _TEMPLATE.model_copy(update={"message": message, "conversation_id": conversation_id})
+
+
+# 高频测试中使用orjson解析响应体，替代 response.json()
+parse = orjson.loads
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+def orjson_post(client, url: str, data):
+    """
+    使用orjson序列化请求体的POST。
+    
+    同时适用于TestClient和httpx.AsyncClient（后者返回可await的协程）。
+    """
+    return client.post(url, content=orjson.dumps(data), headers=_JSON_HEADERS)
+
+
+# 测试中创建的会话ID，在测试会话结束时统一清理
+created_conversations = []
+
+
+def register(conversation_id: str) -> str:
+    """登记测试创建的会话，便于会话结束时批量清理"""
+    created_conversations.append(conversation_id)
+    return conversation_id
+
+
+def run_script(main):
+    """
+    以asyncio.Runner运行独立测试脚本的入口协程函数。
+    
+    Args:
+        main: 无参数的协程函数
+        
+    Returns:
+        协程的返回值
+    """
+    with asyncio.Runner(loop_factory=LOOP_FACTORY) as runner:
+        return runner.run(main())
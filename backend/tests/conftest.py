@@ -0,0 +1,61 @@
+"""
+tests包的共享夹具
+
+ChatWorkflow在整个测试会话中只构建并编译一次；
+需要干净状态的测试使用fresh_workflow，只清空会话字典而不重建图。
+默认AI模型被替换为确定性的回显模型，测试不会调用真实的LLM。
+"""
+
+from typing import AsyncGenerator
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from langchain_core.messages import HumanMessage
+
+from app.chat.ai_models import AIModelInterface
+
+
+class EchoAIModel(AIModelInterface):
+    """确定性的模拟模型：回复中包含上下文里的用户消息数和最新的用户输入"""
+    
+    @staticmethod
+    def _reply(messages) -> str:
+        user_messages = [m for m in messages if isinstance(m, HumanMessage)]
+        # 上下文按时间倒序排列，第一条用户消息即最新输入
+        latest = user_messages[0].content if user_messages else ""
+        return f"mock reply to message #{len(user_messages)}: {latest}"
+    
+    async def generate_response(self, messages, **kwargs) -> str:
+        return self._reply(messages)
+    
+    async def generate_response_stream(self, messages, **kwargs) -> AsyncGenerator[str, None]:
+        yield self._reply(messages)
+    
+    @property
+    def model_info(self):
+        return {"provider": "Echo", "model_name": "echo"}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def llm_mock():
+    """整个测试会话中，新建的ChatWorkflow默认使用回显模型而不是真实的AI提供者"""
+    model = EchoAIModel()
+    with patch("app.chat.workflow.create_default_model", return_value=model):
+        yield model
+
+
+@pytest_asyncio.fixture(scope="session")
+async def workflow(llm_mock):
+    """会话级ChatWorkflow，LangGraph图只编译一次（在会话事件循环上编译）"""
+    from app.chat.workflow import ChatWorkflow
+    w = ChatWorkflow()
+    await w.async_setup()
+    return w
+
+
+@pytest.fixture
+def fresh_workflow(workflow):
+    """清空会话后的共享工作流，供依赖初始状态的测试使用"""
+    workflow.conversations.clear()
+    return workflow
@@ -3,23 +3,26 @@ Tests for the ChatWorkflow implementation.
 """
 
 import pytest
-import asyncio
 from datetime import datetime
+from pydantic import ValidationError
 
-from app.chat.workflow import ChatWorkflow
 from app.models.chat import ChatRequest, ChatResponse
 from app.models.message import MessageType
 
 
+VARIETY_MESSAGES = (
+    "Short",
+    "This is a longer message to test response variety",
+    "Another different message",
+    "Yet another unique input",
+    "Final test message",
+)
+
+
 class TestChatWorkflow:
     """Test cases for ChatWorkflow class."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.workflow = ChatWorkflow()
-    
-    @pytest.mark.asyncio
-    async def test_basic_message_processing(self):
+    async def test_basic_message_processing(self, workflow):
         """Test basic message processing through the workflow."""
         # Create a test request
         request = ChatRequest(
@@ -28,7 +31,7 @@ class TestChatWorkflow:
         )
         
         # Process the message
-        response = await self.workflow.process_message(request)
+        response = await workflow.process_message(request)
         
         # Verify response structure
         assert isinstance(response, ChatResponse)
@@ -40,15 +43,14 @@ class TestChatWorkflow:
         assert response.processing_time is not None
         assert response.processing_time >= 0
     
-    @pytest.mark.asyncio
-    async def test_conversation_continuity(self):
+    async def test_conversation_continuity(self, workflow):
         """Test that conversation context is maintained across messages."""
         # First message
         request1 = ChatRequest(
             message="Hello, my name is Alice",
             conversation_id=None
         )
-        response1 = await self.workflow.process_message(request1)
+        response1 = await workflow.process_message(request1)
         conversation_id = response1.conversation_id
         
         # Second message in the same conversation
@@ -56,14 +58,14 @@ class TestChatWorkflow:
             message="What did I just tell you?",
             conversation_id=conversation_id
         )
-        response2 = await self.workflow.process_message(request2)
+        response2 = await workflow.process_message(request2)
         
         # Verify conversation continuity
         assert response2.conversation_id == conversation_id
         assert "message #2" in response2.response  # Should indicate it's the second message
         
         # Check conversation history
-        conversation = self.workflow.get_conversation(conversation_id)
+        conversation = workflow.get_conversation(conversation_id)
         assert conversation is not None
         assert len(conversation.messages) == 4  # 2 user + 2 AI messages
         
@@ -73,100 +75,113 @@ class TestChatWorkflow:
         assert len(user_messages) == 2
         assert len(ai_messages) == 2
     
-    @pytest.mark.asyncio
-    async def test_greeting_detection(self):
-        """Test that greeting messages are handled specially."""
-        request = ChatRequest(
-            message="Hi there!",
-            conversation_id=None
-        )
-        
-        response = await self.workflow.process_message(request)
-        
-        # Should contain greeting response
-        assert "Hello!" in response.response
-    
-    @pytest.mark.asyncio
-    async def test_empty_message_handling(self):
-        """Test handling of empty or whitespace-only messages."""
-        request = ChatRequest(
-            message="   ",  # Whitespace only
-            conversation_id=None
-        )
-        
-        response = await self.workflow.process_message(request)
-        
-        # Should return error response
-        assert "error" in response.response.lower()
-    
-    def test_conversation_management(self):
+    async def test_conversation_management(self, fresh_workflow):
         """Test conversation management methods."""
         # Initially no conversations
-        assert self.workflow.get_conversation("nonexistent") is None
+        assert fresh_workflow.get_conversation("nonexistent") is None
         
         # Create a conversation through message processing
-        asyncio.run(self._create_test_conversation())
+        await self._create_test_conversation(fresh_workflow)
         
         # Test conversation retrieval
-        conversations = list(self.workflow.conversations.keys())
+        conversations = list(fresh_workflow.conversations.keys())
         assert len(conversations) >= 1
         
         conversation_id = conversations[0]
-        conversation = self.workflow.get_conversation(conversation_id)
+        conversation = fresh_workflow.get_conversation(conversation_id)
         assert conversation is not None
         
         # Test history retrieval
-        history = self.workflow.get_conversation_history(conversation_id)
+        history = fresh_workflow.get_conversation_history(conversation_id)
         assert len(history) > 0
         
         # Test conversation clearing
-        assert self.workflow.clear_conversation(conversation_id) is True
-        assert self.workflow.get_conversation(conversation_id) is None
-        assert self.workflow.clear_conversation(conversation_id) is False  # Already cleared
+        assert fresh_workflow.clear_conversation(conversation_id) is True
+        assert fresh_workflow.get_conversation(conversation_id) is None
+        assert fresh_workflow.clear_conversation(conversation_id) is False  # Already cleared
+    
+    def test_bulk_clear(self, workflow):
+        """Test clearing several conversations at once."""
+        for conversation_id in ("bulk_1", "bulk_2"):
+            workflow._safe_add_message(conversation_id, "Hello", MessageType.USER)
+        
+        cleared = workflow.bulk_clear(["bulk_1", "bulk_2", "missing"])
+        
+        assert cleared == 2
+        assert workflow.get_conversation("bulk_1") is None
+        assert workflow.get_conversation("bulk_2") is None
     
-    async def _create_test_conversation(self):
+    async def _create_test_conversation(self, workflow):
         """Helper method to create a test conversation."""
         request = ChatRequest(
             message="Test message",
             conversation_id=None
         )
-        await self.workflow.process_message(request)
+        await workflow.process_message(request)
     
-    @pytest.mark.asyncio
-    async def test_workflow_state_management(self):
+    async def test_workflow_state_management(self, workflow):
         """Test that workflow state is properly managed."""
         request = ChatRequest(
             message="Test state management",
             conversation_id="test_conv_123"
         )
         
-        response = await self.workflow.process_message(request)
+        response = await workflow.process_message(request)
         
         # Verify state was properly managed
         assert response.conversation_id == "test_conv_123"
         
         # Check that conversation was created with correct ID
-        conversation = self.workflow.get_conversation("test_conv_123")
+        conversation = workflow.get_conversation("test_conv_123")
         assert conversation is not None
         assert conversation.id == "test_conv_123"
     
-    @pytest.mark.asyncio
-    async def test_mock_response_variety(self):
-        """Test that mock responses show variety based on input."""
-        responses = []
+    async def test_process_messages_batch(self, workflow):
+        """Test that a batch returns one response per request, in order."""
+        requests = [ChatRequest(message=msg) for msg in VARIETY_MESSAGES]
+        
+        responses = await workflow.process_messages_batch(requests)
+        
+        assert len(responses) == len(requests)
+        assert all(isinstance(r, ChatResponse) for r in responses)
+        assert len({r.conversation_id for r in responses}) == len(requests)
+        for request, response in zip(requests, responses):
+            conversation = workflow.get_conversation(response.conversation_id)
+            assert conversation.messages[0].content == request.message
+    
+    async def test_greeting_detection(self):
+        """Test that greeting messages are handled specially by the mock model."""
+        # Greeting handling lives in MockAIModel, which llm_mock replaces in the shared workflow
+        from app.chat.ai_models import MockAIModel
+        from app.chat.workflow import ChatWorkflow
+        greeting_workflow = ChatWorkflow(ai_model=MockAIModel())
+        await greeting_workflow.async_setup()
         
-        # Generate multiple responses with different inputs
-        test_messages = [
-            "Short",
-            "This is a longer message to test response variety",
-            "Another different message",
-            "Yet another unique input",
-            "Final test message"
-        ]
+        response = await greeting_workflow.process_message(ChatRequest(message="Hi there!"))
         
-        for msg in test_messages:
+        # Should contain greeting response
+        assert response.response.startswith("你好！")
+    
+    def test_whitespace_only_request_rejected(self):
+        """Test that whitespace-only messages are rejected before reaching the workflow."""
+        with pytest.raises(ValidationError):
+            ChatRequest(message="   ")
+    
+    async def test_empty_message_handling(self, workflow):
+        """Test handling of empty input that bypasses request validation."""
+        request = ChatRequest.model_construct(message="   ", conversation_id=None)
+        
+        response = await workflow.process_message(request)
+        
+        # Should return an error response explaining the input was empty
+        assert "empty" in response.response.lower()
+    
+    async def test_mock_response_variety(self, workflow):
+        """Test that mock responses show variety based on input."""
+        responses = []
+        for msg in VARIETY_MESSAGES:
             request = ChatRequest(message=msg, conversation_id=None)
-            response = await self.workflow.process_message(request)
+            response = await workflow.process_message(request)
             responses.append(response.response)
         
         # Verify we get different responses (at least some variety)
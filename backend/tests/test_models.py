@@ -2,6 +2,7 @@
 Unit tests for Pydantic data models.
 """
 
+import orjson
 import pytest
 from datetime import datetime
 from pydantic import ValidationError
@@ -9,6 +10,10 @@ from pydantic import ValidationError
 from app.models.chat import ChatRequest, ChatResponse
 from app.models.message import Message, Conversation, MessageType
 
+# Oversized payloads, one character past each model's max_length
+_LONG_MSG = "x" * 1001
+_LONG_CONTENT = "x" * 10001
+
 
 class TestChatRequest:
     """Test cases for ChatRequest model."""
@@ -40,9 +45,8 @@ class TestChatRequest:
     
     def test_message_too_long_validation(self):
         """Test validation of message that's too long."""
-        long_message = "x" * 1001
         with pytest.raises(ValidationError):
-            ChatRequest(message=long_message)
+            ChatRequest(message=_LONG_MSG)
     
     def test_message_trimming(self):
         """Test that message content is trimmed."""
@@ -111,6 +115,14 @@ class TestMessage:
         )
         assert message.metadata == metadata
     
+    def test_message_ids_are_unique(self):
+        """Test that generated message IDs are unique and monotonically numbered."""
+        first = Message(content="One", type=MessageType.USER, conversation_id="conv_123")
+        second = Message(content="Two", type=MessageType.USER, conversation_id="conv_123")
+        assert first.id != second.id
+        assert first.id.startswith("msg_")
+        assert first.id < second.id
+    
     def test_empty_content_validation(self):
         """Test validation of empty content."""
         with pytest.raises(ValidationError):
@@ -122,10 +134,9 @@ class TestMessage:
     
     def test_content_too_long_validation(self):
         """Test validation of content that's too long."""
-        long_content = "x" * 10001
         with pytest.raises(ValidationError):
             Message(
-                content=long_content,
+                content=_LONG_CONTENT,
                 type=MessageType.USER,
                 conversation_id="conv_123"
             )
@@ -172,6 +183,20 @@ class TestMessage:
         assert message.type == MessageType.USER
         assert message.conversation_id == "conv_123"
         assert message.metadata == {"test": "value"}
+    
+    def test_message_dict_round_trip(self):
+        """Test that from_dict restores to_dict output without mutating the input."""
+        message = Message(
+            content="Hello!",
+            type=MessageType.AI,
+            conversation_id="conv_123",
+            metadata={"source": "test"}
+        )
+        data = message.to_dict()
+        timestamp = data["timestamp"]
+        
+        assert Message.from_dict(data) == message
+        assert data["timestamp"] == timestamp
 
 
 class TestConversation:
@@ -203,6 +228,7 @@ class TestConversation:
         assert message.type == MessageType.USER
         assert message.conversation_id == conversation.id
         assert conversation.updated_at > original_updated_at
+        assert conversation.updated_at == message.timestamp
     
     def test_add_message_with_metadata(self):
         """Test adding a message with metadata."""
@@ -233,6 +259,19 @@ class TestConversation:
         assert all(msg.type == MessageType.USER for msg in user_messages)
         assert all(msg.type == MessageType.AI for msg in ai_messages)
     
+    def test_get_messages_by_type_after_direct_append(self):
+        """Test that messages appended to the list directly are still found by type."""
+        conversation = Conversation()
+        conversation.add_message("User message 1", MessageType.USER)
+        
+        conversation.messages.append(
+            Message(content="System note", type=MessageType.SYSTEM, conversation_id=conversation.id)
+        )
+        
+        system_messages = conversation.get_messages_by_type(MessageType.SYSTEM)
+        assert [msg.content for msg in system_messages] == ["System note"]
+        assert len(conversation.get_messages_by_type(MessageType.USER)) == 1
+    
     def test_get_recent_messages(self):
         """Test getting recent messages."""
         conversation = Conversation()
@@ -248,6 +287,19 @@ class TestConversation:
         assert recent_messages[0].content == "Message 14"
         assert recent_messages[4].content == "Message 10"
     
+    def test_recent_messages_view(self):
+        """Test the newest-first recent messages view."""
+        conversation = Conversation()
+        
+        for i in range(15):
+            conversation.add_message(f"Message {i}", MessageType.USER)
+        
+        recent_messages = conversation.recent_messages_view(limit=5)
+        assert isinstance(recent_messages, tuple)
+        assert len(recent_messages) == 5
+        assert recent_messages[0].content == "Message 14"
+        assert recent_messages[4].content == "Message 10"
+    
     def test_conversation_to_dict(self):
         """Test conversation serialization to dictionary."""
         conversation = Conversation()
@@ -262,6 +314,41 @@ class TestConversation:
         assert "metadata" in data
         assert len(data["messages"]) == 1
         assert data["messages"][0]["content"] == "Hello!"
+        
+        # Each call returns a fresh dictionary the caller may modify
+        data["messages"].clear()
+        assert len(conversation.to_dict()["messages"]) == 1
+    
+    def test_to_dict_reflects_mutations(self):
+        """Test that to_dict output follows later changes to the conversation."""
+        conversation = Conversation()
+        conversation.add_message("Hello!", MessageType.USER)
+        first = conversation.to_dict()
+        
+        conversation.add_message("Hi!", MessageType.AI)
+        second = conversation.to_dict()
+        assert len(first["messages"]) == 1
+        assert len(second["messages"]) == 2
+        
+        conversation.metadata = {"topic": "greeting"}
+        conversation.metadata["lang"] = "en"
+        third = conversation.to_dict()
+        assert third["metadata"] == {"topic": "greeting", "lang": "en"}
+        
+        conversation.messages = conversation.messages[-1:]
+        assert len(conversation.to_dict()["messages"]) == 1
+    
+    def test_conversation_json_round_trip(self):
+        """Test that to_dict output survives an orjson encode/decode and restores the conversation."""
+        conversation = Conversation()
+        conversation.add_message("Hello!", MessageType.USER, metadata={"source": "web"})
+        conversation.add_message("Hi there!", MessageType.AI)
+        conversation.metadata = {"topic": "greeting"}
+        
+        restored = Conversation.from_dict(orjson.loads(orjson.dumps(conversation.to_dict())))
+        
+        assert restored == conversation
+        assert restored.get_messages_by_type(MessageType.AI)[0].content == "Hi there!"
     
     def test_conversation_from_dict(self):
         """Test conversation deserialization from dictionary."""
@@ -287,4 +374,52 @@ class TestConversation:
         assert conversation.id == "conv_test123"
         assert len(conversation.messages) == 1
         assert conversation.messages[0].content == "Hello!"
-        assert conversation.metadata == {"test": "value"}
\ No newline at end of file
+        assert conversation.metadata == {"test": "value"}
+        assert conversation.get_messages_by_type(MessageType.USER) == conversation.messages
+    
+    def test_from_dict_restores_chronological_order(self):
+        """Test that out-of-order input is sorted once so recent-message queries need no sort."""
+        data = {
+            "id": "conv_unordered",
+            "messages": [
+                {"content": f"Message {i}", "type": "user", "conversation_id": "conv_unordered",
+                 "timestamp": f"2024-01-01T12:00:0{i}Z"}
+                for i in (2, 0, 1)
+            ]
+        }
+        
+        conversation = Conversation.from_dict(data)
+        
+        assert [m.content for m in conversation.messages] == ["Message 0", "Message 1", "Message 2"]
+        assert conversation.get_recent_messages(limit=1)[0].content == "Message 2"
+        assert conversation.get_messages_by_type(MessageType.USER)[0].content == "Message 0"
+    
+    def test_from_dict_orders_mixed_naive_and_utc_timestamps(self):
+        """Test that persisted data mixing naive and Z-suffixed timestamps still loads in order."""
+        data = {
+            "id": "conv_mixed",
+            "messages": [
+                {"content": "Later", "type": "ai", "conversation_id": "conv_mixed",
+                 "timestamp": "2024-01-01T12:00:05"},
+                {"content": "Earlier", "type": "user", "conversation_id": "conv_mixed",
+                 "timestamp": "2024-01-01T12:00:00Z"}
+            ]
+        }
+        
+        conversation = Conversation.from_dict(data)
+        
+        assert [m.content for m in conversation.messages] == ["Earlier", "Later"]
+        assert data["messages"][0]["content"] == "Later"
+    
+    def test_from_dict_returns_independent_instances(self):
+        """Test that identical payloads never share a (mutable) conversation instance."""
+        data = {"id": "conv_same", "messages": [], "metadata": {}}
+        
+        first = Conversation.from_dict(data)
+        second = Conversation.from_dict(data)
+        first.add_message("Hello!", MessageType.USER)
+        first.metadata["touched"] = True
+        
+        assert first is not second
+        assert second.messages == []
+        assert second.metadata == {}
\ No newline at end of file